@@ -0,0 +1 @@
+"""Benchmarks for bw-secrets (run from the repo root: python -m benchmarks.<name>)."""
@@ -0,0 +1,148 @@
+"""Benchmark: GET tail latency while abusive clients are connected.
+
+Starts the daemon with short deadlines, times GET requests from a
+well-behaved client, then times them again while other clients hold idle
+connections, drip requests one byte at a time, pipeline LIST without
+reading the responses and send oversized requests. The daemon drops the
+abusers on its read/write deadlines and size cap; the good client's p99
+should stay where it was. Prints the connection counters from STATS.
+
+Usage:
+    python -m benchmarks.bench_abuse [--items 10000] [--requests 2000]
+"""
+
+import argparse
+import json
+import socket
+import threading
+import time
+
+from .bench_reload import percentile
+from .harness import fake_environment, request, running_daemon
+
+
+def time_gets(sock_path: str, items: int, requests: int) -> list[float]:
+    times = []
+    for i in range(requests):
+        start = time.perf_counter()
+        response = request(sock_path, f"GET item-{i % items} password")
+        times.append((time.perf_counter() - start) * 1e3)
+        if not response.startswith("OK "):
+            raise RuntimeError(f"GET failed: {response}")
+    return times
+
+
+def connect(sock_path: str) -> socket.socket:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(sock_path)
+    return sock
+
+
+def idle(sock_path: str, stop: threading.Event):
+    """Open a connection and never send anything."""
+    while not stop.is_set():
+        with connect(sock_path) as sock:
+            sock.settimeout(0.5)
+            while not stop.is_set():
+                try:
+                    if not sock.recv(1):
+                        break  # dropped on the read deadline
+                except socket.timeout:
+                    pass
+                except OSError:
+                    break
+
+
+def slow_drip(sock_path: str, stop: threading.Event):
+    """Send a request one byte every 100 ms."""
+    while not stop.is_set():
+        with connect(sock_path) as sock:
+            try:
+                for byte in b"GET item-0 password" * 100:
+                    if stop.wait(0.1):
+                        return
+                    sock.send(bytes([byte]))
+            except OSError:
+                pass  # dropped on the read deadline
+
+
+def no_read(sock_path: str, stop: threading.Event):
+    """Pipeline LIST requests and never read the responses."""
+    while not stop.is_set():
+        with connect(sock_path) as sock:
+            sock.settimeout(0.5)
+            try:
+                while not stop.is_set():
+                    try:
+                        sock.send(b"LIST\n" * 100)
+                    except socket.timeout:
+                        pass
+            except OSError:
+                pass  # aborted on the write deadline
+
+
+def oversized(sock_path: str, stop: threading.Event, size: int):
+    """Send requests above the size cap."""
+    payload = b"GET " + b"x" * size + b"\n"
+    while not stop.is_set():
+        with connect(sock_path) as sock:
+            try:
+                sock.sendall(payload)
+                sock.recv(1024)
+            except OSError:
+                pass
+        stop.wait(0.05)
+
+
+def report(label: str, times: list[float]):
+    print(f"{label:>12} {len(times):>8} {percentile(times, 0.5):>9.2f} "
+          f"{percentile(times, 0.99):>9.2f} {max(times):>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--abusers", type=int, default=4,
+                        help="clients of each abusive kind")
+    args = parser.parse_args()
+
+    max_request = 64 * 1024
+    with fake_environment(args.items) as env:
+        env.update(
+            BW_MAX_CONNECTIONS=str(args.abusers * 4 + 8),
+            BW_READ_TIMEOUT="1",
+            BW_WRITE_TIMEOUT="1",
+            BW_MAX_REQUEST=str(max_request),
+        )
+        with running_daemon(env):
+            sock_path = env["BW_SECRETS_SOCKET"]
+            baseline = time_gets(sock_path, args.items, args.requests)
+
+            stop = threading.Event()
+            threads = [
+                threading.Thread(target=target, args=(sock_path, stop, *extra), daemon=True)
+                for target, extra in ((idle, ()), (slow_drip, ()), (no_read, ()),
+                                      (oversized, (max_request * 2,)))
+                for _ in range(args.abusers)
+            ]
+            for thread in threads:
+                thread.start()
+            time.sleep(1.5)  # let the abusers hit the deadlines at least once
+            abused = time_gets(sock_path, args.items, args.requests)
+            stop.set()
+            for thread in threads:
+                thread.join(timeout=2)
+
+            counters = json.loads(request(sock_path, "STATS")[3:])["connections"]
+
+    print(f"{args.items} items, {args.abusers} clients of each abusive kind, "
+          f"max {env['BW_MAX_CONNECTIONS']} connections")
+    print(f"{'GET':>12} {'requests':>8} {'p50, ms':>9} {'p99, ms':>9} {'max, ms':>9}")
+    report("baseline", baseline)
+    report("under abuse", abused)
+    print("connections: " + ", ".join(f"{key} {value}" for key, value in counters.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Benchmark: vault values in the mlocked Arena vs plain str objects.
+
+Builds the same synthetic vault with bitwarden.SEAL_VALUES off and on and
+reports the Python heap it keeps (tracemalloc), the arena size, build
+time, the cost of a field lookup and of wiping a generation.
+
+Usage:
+    python -m benchmarks.bench_arena [--items 100000] [--lookups 200000]
+"""
+
+import argparse
+import gc
+import io
+import json
+import time
+import tracemalloc
+
+from bw_secrets import bitwarden
+from bw_secrets.bitwarden import iter_items, read_vault
+
+from .vaultgen import generate
+
+
+def build(data: str, seal: bool):
+    """(vault, heap bytes kept, seconds) for one build with SEAL_VALUES=seal."""
+    bitwarden.SEAL_VALUES = seal
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    # Decoded item by item, as load_vault does with the bw pipe
+    vault = read_vault(iter_items(io.StringIO(data)))
+    seconds = time.perf_counter() - start
+    gc.collect()
+    heap = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return vault, heap, seconds
+
+
+def lookup_ns(vault, names: list[str], lookups: int) -> float:
+    start = time.perf_counter()
+    for i in range(lookups):
+        vault[names[i % len(names)]]["password"]
+    return (time.perf_counter() - start) / lookups * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=200000)
+    args = parser.parse_args()
+
+    items = generate(args.items)["items"]
+    names = [item["name"] for item in items]
+    data = json.dumps(items)
+    del items
+
+    print(f"{args.items} items, {args.lookups} lookups")
+    print(f"{'storage':>8} {'heap, MB':>9} {'arena, MB':>10} {'build, s':>9} "
+          f"{'lookup, ns':>11} {'wipe, ms':>9}")
+    for label, seal in (("str", False), ("arena", True)):
+        vault, heap, seconds = build(data, seal)
+        lookup = lookup_ns(vault, names, args.lookups)
+        arena = vault.arena.size if vault.arena is not None else 0
+        locked = " (mlocked)" if vault.arena is not None and vault.arena.locked else ""
+        start = time.perf_counter()
+        vault.wipe()
+        wipe = time.perf_counter() - start
+        print(f"{label:>8} {heap / 1e6:>9.1f} {arena / 1e6:>10.1f} {seconds:>9.2f} "
+              f"{lookup:>11.0f} {wipe * 1e3:>9.1f}{locked}")
+        del vault
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""Benchmark: throughput and latency of the daemon under concurrent clients.
+
+Starts the daemon against a fake `bw` and a synthetic vault, then runs N
+asyncio clients for a fixed time, each sending commands drawn from a
+weighted mix. Clients open a connection per request, as bw-get does, or
+keep one open (--persistent). Reports throughput and p50/p99/max latency
+of successful requests and error counts per command, and can write them as JSON to compare runs.
+
+RELOAD is not in the default mix: a client sending it waits for the
+coalesced reload (at least BW_RELOAD_MIN_INTERVAL), so it mostly measures
+that wait. Add it to see GET latency while reloads run.
+
+Usage:
+    python -m benchmarks.bench_concurrent [--clients 32] [--duration 10]
+        [--mix get_hit=80,get_miss=5,list=5,suggest=9,reload=1] [--json results.json]
+        [--baseline previous.json]
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import time
+from collections import Counter
+
+from bw_secrets import VERSION
+
+from .bench_reload import percentile
+from .harness import fake_environment, running_daemon
+
+# Command line for each mix entry and the response prefix that counts as success
+COMMANDS = {
+    "get_hit": ("GET item-{i} password", "OK "),
+    "get_miss": ("GET missing-{i} password", "ERROR item not found"),
+    "list": ("LIST", "OK "),
+    "suggest": ("SUGGEST item-{i}", "OK "),
+    "reload": ("RELOAD", "OK "),
+}
+DEFAULT_MIX = "get_hit=80,get_miss=5,list=5,suggest=10"
+
+
+def parse_mix(spec: str) -> dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name not in COMMANDS:
+            raise SystemExit(f"unknown command in --mix: {name} (known: {', '.join(COMMANDS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+class Connection:
+    """One text-protocol connection; reopened per request unless persistent."""
+
+    def __init__(self, sock_path: str, persistent: bool):
+        self.sock_path = sock_path
+        self.persistent = persistent
+        self.streams = None
+
+    async def request(self, line: str) -> str:
+        if self.streams is None:
+            self.streams = await asyncio.open_unix_connection(self.sock_path, limit=2 ** 26)
+        reader, writer = self.streams
+        try:
+            writer.write(f"{line}\n".encode())
+            await writer.drain()
+            response = await reader.readline()
+            if not response:
+                raise ConnectionResetError("daemon closed the connection")
+        except BaseException:
+            await self.close()
+            raise
+        if not self.persistent:
+            await self.close()
+        return response.decode()
+
+    async def close(self):
+        if self.streams is not None:
+            writer = self.streams[1]
+            self.streams = None
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+async def client(number: int, sock_path: str, args, mix: dict, deadline: float, results: dict):
+    rng = random.Random(args.seed + number)
+    names, weights = list(mix), list(mix.values())
+    connection = Connection(sock_path, args.persistent)
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        template, expected = COMMANDS[name]
+        result = results[name]
+        start = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(
+                connection.request(template.format(i=rng.randrange(args.items))), args.timeout
+            )
+        except (OSError, asyncio.TimeoutError) as e:
+            result["errors"][type(e).__name__] = result["errors"].get(type(e).__name__, 0) + 1
+            continue
+        if response.startswith(expected):
+            result["latencies"].append(time.perf_counter() - start)
+        else:
+            error = response.split(":")[0].strip()[:60]
+            result["errors"][error] = result["errors"].get(error, 0) + 1
+    await connection.close()
+
+
+async def run(sock_path: str, args, mix: dict) -> tuple[dict, float]:
+    results = {name: {"latencies": [], "errors": {}} for name in mix}
+    start = time.perf_counter()
+    deadline = start + args.duration
+    await asyncio.gather(*(
+        client(number, sock_path, args, mix, deadline, results) for number in range(args.clients)
+    ))
+    return results, time.perf_counter() - start
+
+
+def summarize(latencies: list[float], errors: dict, seconds: float) -> dict:
+    ms = [latency * 1e3 for latency in latencies]
+    return {
+        "requests": len(ms) + sum(errors.values()),
+        "throughput": len(ms) / seconds,
+        "p50_ms": percentile(ms, 0.5) if ms else None,
+        "p99_ms": percentile(ms, 0.99) if ms else None,
+        "max_ms": max(ms) if ms else None,
+        "errors": sum(errors.values()),
+        "error_kinds": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run")
+    parser.add_argument("--mix", default=DEFAULT_MIX,
+                        help="comma-separated command=weight (commands: %s)" % ", ".join(COMMANDS))
+    parser.add_argument("--persistent", action="store_true",
+                        help="one connection per client instead of one per request")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="seconds the fake bw sleeps per command (RELOAD cost)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", metavar="PATH", help="write results as JSON to PATH")
+    parser.add_argument("--baseline", metavar="PATH",
+                        help="JSON from an earlier run to compare against")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    with fake_environment(args.items, latency=args.latency) as env:
+        # Let the clients, not the default connection limits, set the load
+        env.setdefault("BW_MAX_CONNECTIONS", str(max(64, args.clients * 2)))
+        with running_daemon(env):
+            results, seconds = asyncio.run(run(env["BW_SECRETS_SOCKET"], args, mix))
+
+    commands = {name: summarize(r["latencies"], r["errors"], seconds) for name, r in results.items()}
+    total = summarize(
+        [latency for r in results.values() for latency in r["latencies"]],
+        dict(sum((Counter(r["errors"]) for r in results.values()), Counter())),
+        seconds,
+    )
+
+    print(f"{args.items} items, {args.clients} clients, {seconds:.1f}s, "
+          f"{'persistent' if args.persistent else 'per-request'} connections")
+    print(f"{'command':>9} {'requests':>9} {'req/s':>9} {'p50, ms':>9} {'p99, ms':>9} "
+          f"{'max, ms':>9} {'errors':>7}")
+    for name, row in [*commands.items(), ("total", total)]:
+        if not row["requests"]:
+            continue
+        latency = " ".join(
+            f"{row[key]:>9.2f}" if row[key] is not None else f"{'-':>9}"
+            for key in ("p50_ms", "p99_ms", "max_ms")
+        )
+        print(f"{name:>9} {row['requests']:>9} {row['throughput']:>9.0f} {latency} {row['errors']:>7}")
+    for kind, count in total["error_kinds"].items():
+        print(f"  error: {kind} x{count}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"vs {args.baseline} (version {baseline['version']}):")
+        for name, row in [*commands.items(), ("total", total)]:
+            before = baseline["total"] if name == "total" else baseline["commands"].get(name)
+            if not before or not row["requests"] or not before["requests"]:
+                continue
+            changes = [f"req/s {(row['throughput'] / before['throughput'] - 1) * 100:+.0f}%"]
+            for key in ("p50_ms", "p99_ms"):
+                if row[key] and before[key]:
+                    changes.append(f"{key[:3]} {(row[key] / before[key] - 1) * 100:+.0f}%")
+            print(f"{name:>9} {'  '.join(changes)}")
+
+    if args.json:
+        report = {
+            "version": VERSION,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "started": time.time() - seconds,
+            "config": {
+                "items": args.items, "clients": args.clients, "duration": args.duration,
+                "mix": mix, "persistent": args.persistent, "latency": args.latency,
+                "seed": args.seed,
+            },
+            "seconds": seconds,
+            "total": total,
+            "commands": commands,
+        }
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Benchmark: text vs framed protocol throughput for large values.
+
+Every item carries a notes field of --value-size bytes (no newlines, so the
+text protocol can carry it too). Both protocols fetch it repeatedly over
+one persistent connection.
+
+Usage:
+    python -m benchmarks.bench_framing [--value-size 1048576] [--requests 200]
+"""
+
+import argparse
+import time
+
+from bw_secrets.cli import DaemonConnection
+
+from .harness import fake_environment, running_daemon
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--value-size", type=int, default=1024 * 1024)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    with fake_environment(4, note_size=args.value_size) as env, running_daemon(env):
+        print(f"{args.requests} x GET of a {args.value_size / 1024 / 1024:.2f} MB value")
+        for framed in (False, True):
+            with DaemonConnection(env["BW_SECRETS_SOCKET"], framed=framed) as conn:
+                start = time.perf_counter()
+                for i in range(args.requests):
+                    response = conn.request(["GET", f"item-{i % 4}", "notes"])
+                    assert len(response) == args.value_size + 3
+                elapsed = time.perf_counter() - start
+                assert conn.framed == framed
+            total_mb = args.requests * args.value_size / 1024 / 1024
+            print(f"  {'framed' if framed else 'text':>6}: {total_mb / elapsed:8.1f} MB/s"
+                  f"  {elapsed / args.requests * 1000:7.2f} ms/request")
+
+
+if __name__ == "__main__":
+    main()
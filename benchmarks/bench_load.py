@@ -0,0 +1,100 @@
+"""Benchmark: peak RSS and wall time of loading the vault from a `bw` pipe.
+
+Compares the old buffered loader (whole stdout + json.loads) with the
+streaming loader used by bitwarden.load_vault. Both build the same Vault
+with read_vault, so only the reading differs. Each measurement runs in a
+fresh interpreter so ru_maxrss reflects only that loader.
+
+Usage:
+    python -m benchmarks.bench_load [--sizes 1000,10000,100000]
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from bw_secrets.bitwarden import iter_items, read_vault
+
+from .vaultgen import generate
+
+MODES = ("buffered", "streaming")
+
+
+def peak_rss_kb() -> int:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def worker(mode: str, path: str):
+    """Load `path` through a `cat` pipe, mimicking `bw list items`."""
+    baseline = peak_rss_kb()
+    start = time.perf_counter()
+
+    if mode == "buffered":
+        result = subprocess.run(["cat", path], capture_output=True, text=True, check=True)
+        vault = read_vault(json.loads(result.stdout))
+        del result
+    else:
+        with subprocess.Popen(["cat", path], stdout=subprocess.PIPE, text=True) as proc:
+            vault = read_vault(iter_items(proc.stdout))
+
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        "items": len(vault),
+        "seconds": elapsed,
+        "peak_rss_kb": peak_rss_kb(),
+        "baseline_rss_kb": baseline,
+    }))
+
+
+def run(sizes: list[int]):
+    print(f"{'items':>8} {'mode':>10} {'wall, s':>9} {'peak RSS, MB':>13} {'over base, MB':>14}")
+    for size in sizes:
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+            path = f.name
+        # Generate in a child: Linux keeps ru_maxrss across fork+exec, so the
+        # parent must stay small for worker measurements to be meaningful
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_load", "--generate", str(size), path],
+            check=True,
+        )
+        try:
+            for mode in MODES:
+                out = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_load", "--worker", mode, path],
+                    capture_output=True, text=True, check=True,
+                )
+                r = json.loads(out.stdout)
+                print(
+                    f"{r['items']:>8} {mode:>10} {r['seconds']:>9.3f} "
+                    f"{r['peak_rss_kb'] / 1024:>13.1f} "
+                    f"{(r['peak_rss_kb'] - r['baseline_rss_kb']) / 1024:>14.1f}"
+                )
+        finally:
+            os.unlink(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--worker", choices=MODES)
+    parser.add_argument("--generate", type=int, metavar="COUNT")
+    parser.add_argument("path", nargs="?")
+    args = parser.parse_args()
+
+    if args.generate:
+        with open(args.path, "w") as f:
+            json.dump(generate(args.generate)["items"], f)
+    elif args.worker:
+        worker(args.worker, args.path)
+    else:
+        run([int(s) for s in args.sizes.split(",")])
+
+
+if __name__ == "__main__":
+    main()
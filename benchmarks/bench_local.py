@@ -0,0 +1,152 @@
+"""Benchmark: in-process data.json backend vs parsing `bw list items` output.
+
+Builds a bw CLI data file fixture from a known session key (with one
+organization to exercise RSA-wrapped keys), checks that load_local_vault
+yields the same entries as the bw path, and times full and delta loads.
+Needs the optional `cryptography` package.
+
+Usage:
+    python -m benchmarks.bench_local [--items 10000]
+"""
+
+import argparse
+import base64
+import hashlib
+import hmac
+import io
+import json
+import os
+import tempfile
+import time
+
+from cryptography.hazmat.primitives import hashes, padding, serialization
+from cryptography.hazmat.primitives.asymmetric import padding as asym_padding
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+from bw_secrets.bitwarden import iter_items, read_vault
+from bw_secrets.localdata import load_local_vault
+
+from .vaultgen import generate
+
+USER_ID = "00000000-0000-4000-8000-0000000000aa"
+ORG_ID = "00000000-0000-4000-8000-0000000000bb"
+
+
+def _aes(key: bytes, data: bytes) -> tuple[bytes, bytes, bytes]:
+    iv = os.urandom(16)
+    padder = padding.PKCS7(128).padder()
+    encryptor = Cipher(algorithms.AES(key[:32]), modes.CBC(iv)).encryptor()
+    ct = encryptor.update(padder.update(data) + padder.finalize()) + encryptor.finalize()
+    mac = hmac.new(key[32:], iv + ct, hashlib.sha256).digest()
+    return iv, ct, mac
+
+
+def enc_string(value: str | bytes | None, key: bytes) -> str | None:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.encode()
+    b64 = lambda b: base64.b64encode(b).decode()  # noqa: E731
+    iv, ct, mac = _aes(key, value)
+    return f"2.{b64(iv)}|{b64(ct)}|{b64(mac)}"
+
+
+def encrypt_item(item: dict, key: bytes) -> dict:
+    login = item.get("login") or {}
+    return {
+        "id": item["id"],
+        "organizationId": item.get("organizationId"),
+        "folderId": None,
+        "type": 1,
+        "revisionDate": item["revisionDate"],
+        "name": enc_string(item["name"], key),
+        "notes": enc_string(item.get("notes"), key),
+        "fields": [
+            {"name": enc_string(f["name"], key), "value": enc_string(f["value"], key), "type": 0}
+            for f in item.get("fields", [])
+        ],
+        "login": {
+            "username": enc_string(login.get("username"), key),
+            "password": enc_string(login.get("password"), key),
+            "uris": [{"uri": enc_string(u["uri"], key)} for u in login.get("uris") or []],
+        },
+    }
+
+
+def build_fixture(items: list[dict], session_key: bytes) -> dict:
+    user_key = os.urandom(64)
+    org_key = os.urandom(64)
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_der = private_key.private_bytes(
+        serialization.Encoding.DER, serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    wrapped_org_key = private_key.public_key().encrypt(
+        org_key,
+        asym_padding.OAEP(mgf=asym_padding.MGF1(hashes.SHA1()), algorithm=hashes.SHA1(), label=None),
+    )
+    iv, ct, mac = _aes(session_key, user_key)
+
+    return {
+        "global_account_activeAccountId": USER_ID,
+        f"__PROTECTED__{USER_ID}_user_auto": base64.b64encode(bytes([2]) + iv + mac + ct).decode(),
+        f"user_{USER_ID}_crypto_privateKey": enc_string(private_der, user_key),
+        f"user_{USER_ID}_crypto_organizationKeys": {
+            ORG_ID: {"type": "organization", "key": "4." + base64.b64encode(wrapped_org_key).decode()},
+        },
+        f"user_{USER_ID}_organizations_organizations": {ORG_ID: {"id": ORG_ID, "name": "Acme"}},
+        f"user_{USER_ID}_ciphers_ciphers": {
+            item["id"]: encrypt_item(item, org_key if item.get("organizationId") else user_key)
+            for item in items
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=10000)
+    args = parser.parse_args()
+
+    items = generate(args.items)["items"]
+    for i, item in enumerate(items):
+        item["revisionDate"] = "2026-01-01T00:00:00.000Z"
+        if i % 10 == 0:
+            item["organizationId"] = ORG_ID
+
+    session_key = os.urandom(64)
+    session = base64.b64encode(session_key).decode()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "data.json")
+        with open(path, "w") as f:
+            json.dump(build_fixture(items, session_key), f)
+
+        start = time.perf_counter()
+        bw_path = read_vault(iter_items(io.StringIO(json.dumps(items))))
+        parse_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        full = load_local_vault(session, path=path)
+        full_time = time.perf_counter() - start
+        assert {k: dict(v) for k, v in full.items.items()} == {
+            k: dict(v) for k, v in bw_path.items.items()
+        }, "local backend differs from the bw path"
+
+        # Change 1% of items and reload against the previous generation
+        for item in items[::100]:
+            item["revisionDate"] = "2026-02-01T00:00:00.000Z"
+        with open(path, "w") as f:
+            json.dump(build_fixture(items, session_key), f)
+        start = time.perf_counter()
+        delta = load_local_vault(session, full, path=path)
+        delta_time = time.perf_counter() - start
+
+    print(f"{args.items} items (10% in an organization)")
+    print(f"  parse bw JSON (no bw process):  {parse_time * 1000:8.1f} ms")
+    print(f"  local backend, full load:       {full_time * 1000:8.1f} ms")
+    print(f"  local backend, 1% changed:      {delta_time * 1000:8.1f} ms  ({delta.summary()})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Benchmark: bytes per vault item, plain dicts vs compact Item records.
+
+Usage:
+    python -m benchmarks.bench_memory [--items 100000]
+"""
+
+import argparse
+import io
+import json
+import tracemalloc
+
+from bw_secrets.bitwarden import Item, iter_items, parse_item
+
+from .vaultgen import generate
+
+
+def measure(items: list[dict], compact: bool) -> int:
+    """Bytes allocated while building name -> fields for `items`."""
+    # Decode item by item, as load_vault does with the bw pipe
+    stream = io.StringIO(json.dumps(items))
+    tracemalloc.start()
+    vault = {}
+    before = tracemalloc.get_traced_memory()[0]
+    for item in iter_items(stream):
+        name, fields = parse_item(item)
+        vault[name] = Item.from_dict(fields) if compact else fields
+    del item
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100000)
+    args = parser.parse_args()
+
+    items = generate(args.items)["items"]
+    plain = measure(items, compact=False)
+    compact = measure(items, compact=True)
+
+    print(f"{args.items} items, {len(parse_item(items[0])[1])} fields each")
+    print(f"  dict fields : {plain / args.items:8.1f} bytes/item")
+    print(f"  Item records: {compact / args.items:8.1f} bytes/item "
+          f"({(1 - compact / plain) * 100:.0f}% less)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Benchmark: N single GETs vs one MGET, over the socket and as bw-get processes.
+
+Usage:
+    python -m benchmarks.bench_mget [--keys 25] [--rounds 5]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+from .harness import fake_environment, request, running_daemon
+
+BW_GET = "import sys; from bw_secrets.cli import cmd_get; cmd_get()"
+
+
+def timed(fn, rounds: int) -> float:
+    """Median wall time of fn() in milliseconds."""
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keys", type=int, default=25, help="secrets per .envrc")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    pairs = [(f"item-{i}", "password") for i in range(args.keys)]
+
+    with fake_environment(max(1000, args.keys)) as env, running_daemon(env):
+        sock_path = env["BW_SECRETS_SOCKET"]
+
+        def socket_gets():
+            for item, field in pairs:
+                assert request(sock_path, f"GET {item} {field}").startswith("OK ")
+
+        def socket_mget():
+            line = "MGET " + " ".join(f"{item} {field}" for item, field in pairs)
+            assert request(sock_path, line).startswith("OK ")
+
+        def process_gets():
+            for item, field in pairs:
+                subprocess.run([sys.executable, "-c", BW_GET, item, field],
+                               env=env, check=True, capture_output=True)
+
+        def process_mget():
+            subprocess.run([sys.executable, "-c", BW_GET, *(f"{i}:{f}" for i, f in pairs)],
+                           env=env, check=True, capture_output=True)
+
+        print(f"{args.keys} keys, median of {args.rounds} rounds")
+        rows = [
+            (f"socket: {args.keys} x GET", socket_gets),
+            ("socket: 1 x MGET", socket_mget),
+            (f"bw-get: {args.keys} processes", process_gets),
+            ("bw-get: 1 process", process_mget),
+        ]
+        for label, fn in rows:
+            print(f"  {label:<24} {timed(fn, args.rounds):9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
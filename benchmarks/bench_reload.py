@@ -0,0 +1,82 @@
+"""Benchmark: GET latency while a slow RELOAD is running.
+
+Starts the daemon against a fake `bw` that sleeps before every command,
+then times GET requests once with the daemon idle and once while a RELOAD
+is in flight in another thread. The reload runs off the event loop, so
+both series should look the same; the script exits non-zero if the max
+GET latency during the reload gets anywhere near the reload time.
+
+Usage:
+    python -m benchmarks.bench_reload [--items 10000] [--latency 2]
+"""
+
+import argparse
+import statistics
+import sys
+import threading
+import time
+
+from .harness import fake_environment, request, running_daemon
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def time_gets(sock_path: str, items: int, until) -> list[float]:
+    times = []
+    i = 0
+    while not until(i):
+        start = time.perf_counter()
+        response = request(sock_path, f"GET item-{i % items} password")
+        times.append((time.perf_counter() - start) * 1e3)
+        if not response.startswith("OK "):
+            raise RuntimeError(f"GET failed: {response}")
+        i += 1
+    return times
+
+
+def report(label: str, times: list[float]):
+    print(f"{label:>14} {len(times):>8} {statistics.mean(times):>9.2f} "
+          f"{percentile(times, 0.5):>9.2f} {percentile(times, 0.99):>9.2f} {max(times):>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--latency", type=float, default=2.0,
+                        help="seconds the fake bw sleeps per command")
+    parser.add_argument("--requests", type=int, default=500,
+                        help="GET requests in the idle series")
+    args = parser.parse_args()
+
+    with fake_environment(args.items, latency=args.latency) as env, running_daemon(env):
+        sock_path = env["BW_SECRETS_SOCKET"]
+        idle = time_gets(sock_path, args.items, lambda i: i >= args.requests)
+
+        reload_result = {}
+
+        def reload():
+            start = time.perf_counter()
+            reload_result["response"] = request(sock_path, "RELOAD", timeout=args.latency * 10 + 60)
+            reload_result["seconds"] = time.perf_counter() - start
+
+        thread = threading.Thread(target=reload)
+        thread.start()
+        during = time_gets(sock_path, args.items, lambda i: not thread.is_alive())
+        thread.join()
+
+    print(f"{args.items} items, fake bw latency {args.latency}s")
+    print(f"RELOAD: {reload_result['response'][:60]} in {reload_result['seconds']:.2f}s")
+    print(f"{'GET':>14} {'requests':>8} {'mean, ms':>9} {'p50, ms':>9} {'p99, ms':>9} {'max, ms':>9}")
+    report("idle", idle)
+    report("during reload", during)
+
+    if max(during) > reload_result["seconds"] * 1e3 / 2:
+        print("FAIL: GET was blocked by the reload", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Benchmark: SEARCH through the prefix/trigram indexes vs a linear scan.
+
+The linear scan does what a search without indexes would have to: check
+every item name for the prefix and compute its trigram similarity.
+
+Usage:
+    python -m benchmarks.bench_search [--items 100000] [--repeat 200]
+"""
+
+import argparse
+import time
+
+from bw_secrets.bitwarden import read_vault
+from bw_secrets.search import SIMILARITY, TermIndex, similarity, trigrams
+
+from .vaultgen import generate
+
+QUERIES = {
+    "exact": "item-4242",
+    "prefix": "item-424",
+    "typo": "itme-4242",
+    "host": "host4242",
+    "field": "field-",
+    "rare field": "deploy-token",
+    "miss": "postgres",
+}
+
+
+def linear_search(names: list[str], query: str, limit: int) -> list[str]:
+    query = query.lower()
+    query_grams = trigrams(query)
+    scored = []
+    for name in names:
+        key = name.lower()
+        if key.startswith(query):
+            scored.append((1.0 + len(query) / len(key), name))
+        else:
+            score = similarity(query_grams, trigrams(key))
+            if score >= SIMILARITY:
+                scored.append((score, name))
+    scored.sort(reverse=True)
+    return [name for _, name in scored[:limit]]
+
+
+def per_call_us(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    items = generate(args.items, note_size=0)["items"]
+    # A field only the last item has: field matches must not scan the vault
+    items[-1]["fields"].append({"name": "deploy-token", "value": "secret", "type": 0})
+    vault = read_vault(iter(items))
+    names = list(vault.keys())
+
+    start = time.perf_counter()
+    TermIndex(names)
+    build = time.perf_counter() - start
+
+    print(f"{args.items} items, name index built in {build * 1e3:.0f} ms")
+    print(f"{'query':>10} {'index, us':>10} {'linear, us':>11} {'speedup':>8}")
+    for label, query in QUERIES.items():
+        indexed = per_call_us(lambda: vault.search(query, 10), args.repeat)
+        linear = per_call_us(lambda: linear_search(names, query, 10), max(1, args.repeat // 100))
+        print(f"{label:>10} {indexed:>10.0f} {linear:>11.0f} {linear / indexed:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Benchmark: request latency of a running daemon over the Unix socket.
+
+Starts the daemon against a fake `bw` and a synthetic vault, then times
+sequential PING, GET (hit and miss), SUGGEST and LIST requests, one
+connection per request as bw-get does.
+
+Usage:
+    python -m benchmarks.bench_serve [--items 10000] [--requests 2000]
+"""
+
+import argparse
+import statistics
+import time
+
+from .harness import fake_environment, request, running_daemon
+
+COMMANDS = {
+    "PING": "PING",
+    "GET hit": "GET item-{i} password",
+    "GET miss": "GET missing-{i} password",
+    "SUGGEST": "SUGGEST item-{i}",
+    "LIST": "LIST",
+}
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    with fake_environment(args.items) as env, running_daemon(env):
+        sock_path = env["BW_SECRETS_SOCKET"]
+        print(f"{args.items} items, {args.requests} requests per command")
+        print(f"{'command':>10} {'mean, us':>10} {'p50, us':>10} {'p99, us':>10}")
+        for label, template in COMMANDS.items():
+            count = args.requests if label != "LIST" else max(1, args.requests // 20)
+            times = []
+            for i in range(count):
+                line = template.format(i=i % args.items)
+                start = time.perf_counter()
+                request(sock_path, line)
+                times.append((time.perf_counter() - start) * 1e6)
+            print(f"{label:>10} {statistics.mean(times):>10.0f} "
+                  f"{percentile(times, 0.5):>10.0f} {percentile(times, 0.99):>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
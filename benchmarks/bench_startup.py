@@ -0,0 +1,107 @@
+"""Benchmark: cold vs warm daemon start, measured as time to the first GET.
+
+Cold start loads the vault through `bw list items`; warm start serves from
+the encrypted snapshot and reconciles with `bw` in the background. The fake
+`bw` (benchmarks.fake_bw) stands in for the real CLI. "activated" is a warm
+start on a socket bound beforehand and passed in with LISTEN_FDS, as a
+service manager would: the client sends one GET right away, which waits in
+the daemon instead of being retried.
+
+Usage:
+    python -m benchmarks.bench_startup [--items 10000] [--bw-latency 2.0] [--runs 3]
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+from .harness import fake_environment, request
+
+
+def start_once(env: dict, timeout: float = 120) -> float:
+    """Spawn the daemon and return seconds until the first successful GET."""
+    sock_path = env["BW_SECRETS_SOCKET"]
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "bw_secrets.daemon"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            try:
+                if request(sock_path, "GET item-0 password", timeout=timeout).startswith("OK "):
+                    return time.perf_counter() - start
+            except OSError:
+                pass
+            if time.perf_counter() - start > timeout or proc.poll() is not None:
+                raise RuntimeError("daemon did not answer")
+            time.sleep(0.005)
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def start_activated(env: dict, timeout: float = 120) -> float:
+    """Spawn the daemon on a pre-bound socket and return seconds until one GET returns."""
+    sock_path = env["BW_SECRETS_SOCKET"]
+    if os.path.exists(sock_path):
+        os.unlink(sock_path)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(sock_path)
+    listener.listen()
+    fd = listener.fileno()
+
+    start = time.perf_counter()
+    # LISTEN_PID must be the daemon's pid: set it in a shell that execs the daemon
+    proc = subprocess.Popen(
+        ["sh", "-c", f'LISTEN_PID=$$ LISTEN_FDS=1 exec "$0" -m bw_secrets.daemon 3<&{fd}',
+         sys.executable],
+        env=env, pass_fds=(fd,), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    listener.close()
+    try:
+        response = request(sock_path, "GET item-0 password", timeout=timeout)
+        if not response.startswith("OK "):
+            raise RuntimeError(f"GET failed: {response}")
+        return time.perf_counter() - start
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--bw-latency", type=float, default=2.0,
+                        help="seconds each fake bw call sleeps")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    results = {"cold": [], "warm": [], "activated": []}
+    with fake_environment(args.items, args.bw_latency) as env:
+        env["BW_SNAPSHOT"] = "1"
+        snapshot_path = env["BW_SECRETS_SNAPSHOT"]
+        for _ in range(args.runs):
+            if os.path.exists(snapshot_path):
+                os.unlink(snapshot_path)
+            results["cold"].append(start_once(env))
+            # Wait for the snapshot written in the background after the cold load
+            for _ in range(1000):
+                if os.path.exists(snapshot_path):
+                    break
+                time.sleep(0.01)
+            results["warm"].append(start_once(env))
+            results["activated"].append(start_activated(env))
+
+    print(f"{args.items} items, bw latency {args.bw_latency}s, {args.runs} runs")
+    for kind, times in results.items():
+        print(f"{kind:>9}: median {statistics.median(times) * 1000:8.1f} ms"
+              f"  min {min(times) * 1000:8.1f} ms  max {max(times) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Benchmark: cost of metrics collection on the GET path.
+
+Runs daemon.process_request("GET ...") in-process against a synthetic
+vault, once with the real Stats and once with a no-op replacement, and
+times Stats.request() on its own.
+
+Usage:
+    python -m benchmarks.bench_stats [--items 10000] [--requests 200000]
+"""
+
+import argparse
+import asyncio
+import time
+
+from bw_secrets import daemon
+from bw_secrets.bitwarden import read_vault
+from bw_secrets.stats import Stats
+
+from .vaultgen import generate
+
+
+class NoStats(Stats):
+    def request(self, command, seconds, error):
+        pass
+
+
+async def time_gets(requests: int, items: int) -> float:
+    lines = [f"GET item-{i % items} password" for i in range(requests)]
+    start = time.perf_counter()
+    for line in lines:
+        await daemon.process_request(line)
+    return (time.perf_counter() - start) / requests * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=200000)
+    args = parser.parse_args()
+
+    vault = read_vault(iter(generate(args.items, note_size=0)["items"]))
+
+    async def install():
+        daemon.stores[""].swap(vault)
+        # What run_server does once the initial load is done
+        daemon.vault_ready = asyncio.Event()
+        daemon.vault_ready.set()
+
+    asyncio.run(install())
+
+    # Alternate the two setups and keep the best round of each to damp noise
+    results = {"no stats": float("inf"), "stats": float("inf")}
+    for _ in range(3):
+        for label, stats in (("no stats", NoStats()), ("stats", Stats())):
+            daemon.stats = stats
+            results[label] = min(results[label], asyncio.run(time_gets(args.requests, args.items)))
+
+    stats = Stats()
+    start = time.perf_counter()
+    for _ in range(args.requests):
+        stats.request("GET", 0.00002, False)
+    record = (time.perf_counter() - start) / args.requests * 1e9
+
+    baseline = results["no stats"]
+    print(f"{args.items} items, {args.requests} GET requests in-process")
+    print(f"  GET without stats: {baseline:7.0f} ns/request")
+    print(f"  GET with stats   : {results['stats']:7.0f} ns/request "
+          f"({(results['stats'] / baseline - 1) * 100:+.1f}%)")
+    print(f"  Stats.request()  : {record:7.0f} ns/call")
+
+
+if __name__ == "__main__":
+    main()
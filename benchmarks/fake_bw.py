@@ -0,0 +1,153 @@
+"""Drop-in fake `bw` CLI backed by a synthetic vault file (see vaultgen).
+
+Answers `list items|folders|organizations|collections`, `sync [--last]`,
+`unlock`, `login`, `status`, `create item` and `config server` from the
+vault file, so the daemon and CLI can run offline.
+
+Environment:
+    FAKE_BW_VAULT    vault JSON written by benchmarks.vaultgen (required)
+    FAKE_BW_STATE    state file for status/server/last sync (default: <vault>.state)
+    FAKE_BW_LATENCY  seconds to sleep before answering each command (default: 0)
+    FAKE_BW_SESSION  session key printed by unlock/login (default: fake-session)
+
+If BITWARDENCLI_APPDATA_DIR contains `fake-vault.json`, that file is used
+as the vault (state next to it) and an optional `fake-latency` file there
+overrides FAKE_BW_LATENCY, so several accounts can be faked at once.
+
+Use install() to put a `bw` shim for this script into a directory on PATH.
+"""
+
+import base64
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+
+def install(bin_dir: str) -> str:
+    """Write a `bw` shim running this script into bin_dir; return its path."""
+    os.makedirs(bin_dir, exist_ok=True)
+    path = os.path.join(bin_dir, "bw")
+    with open(path, "w") as f:
+        f.write(f'#!/bin/sh\nexec "{sys.executable}" "{os.path.abspath(__file__)}" "$@"\n')
+    os.chmod(path, 0o755)
+    return path
+
+
+def now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+def option(args: list[str], name: str) -> str | None:
+    if name in args and args.index(name) + 1 < len(args):
+        return args[args.index(name) + 1]
+    return None
+
+
+def matches(value, wanted: str | None) -> bool:
+    if wanted is None:
+        return True
+    if wanted == "null":
+        return value is None
+    if wanted == "notnull":
+        return value is not None
+    return value == wanted
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = list(sys.argv[1:] if argv is None else argv)
+    appdata = os.environ.get("BITWARDENCLI_APPDATA_DIR", "")
+    latency = os.environ.get("FAKE_BW_LATENCY", "0")
+    if appdata and os.path.exists(os.path.join(appdata, "fake-vault.json")):
+        vault_path = os.path.join(appdata, "fake-vault.json")
+        state_path = f"{vault_path}.state"
+        if os.path.exists(os.path.join(appdata, "fake-latency")):
+            with open(os.path.join(appdata, "fake-latency")) as f:
+                latency = f.read().strip()
+    else:
+        vault_path = os.environ["FAKE_BW_VAULT"]
+        state_path = os.environ.get("FAKE_BW_STATE", f"{vault_path}.state")
+    time.sleep(float(latency))
+    session = os.environ.get("FAKE_BW_SESSION", "fake-session")
+
+    with open(vault_path) as f:
+        vault = json.load(f)
+    try:
+        with open(state_path) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = {"status": "unlocked", "serverUrl": None, "lastSync": None}
+
+    def save_state():
+        with open(state_path, "w") as f:
+            json.dump(state, f)
+
+    command = args[:2]
+    out = None
+
+    if command == ["list", "items"]:
+        out = [
+            item for item in vault["items"]
+            if matches(item.get("organizationId"), option(args, "--organizationid"))
+            and matches(item.get("folderId"), option(args, "--folderid"))
+            and (option(args, "--collectionid") is None
+                 or option(args, "--collectionid") in (item.get("collectionIds") or []))
+            and (option(args, "--search") is None
+                 or option(args, "--search").lower() in item["name"].lower())
+        ]
+    elif command[0] == "list" and len(command) == 2 and command[1] in vault:
+        out = vault[command[1]]
+    elif command == ["config", "server"]:
+        if len(args) > 2:
+            state["serverUrl"] = args[2]
+            save_state()
+            print("Saved setting `config`.")
+        else:
+            print(state.get("serverUrl") or "https://vault.bitwarden.com")
+        return 0
+    elif command[:1] == ["status"]:
+        out = {
+            "serverUrl": state.get("serverUrl"),
+            "lastSync": state.get("lastSync"),
+            "userEmail": "bench@example.com",
+            "userId": "00000000-0000-4000-8000-000000000000",
+            "status": state.get("status", "unlocked"),
+        }
+    elif command[:1] in (["unlock"], ["login"]):
+        state["status"] = "unlocked"
+        save_state()
+        print(session if "--raw" in args else f'export BW_SESSION="{session}"')
+        return 0
+    elif command[:1] == ["lock"]:
+        state["status"] = "locked"
+        save_state()
+        print("Your vault is locked.")
+        return 0
+    elif command[:1] == ["sync"]:
+        if "--last" in args:
+            print(state.get("lastSync") or "")
+            return 0
+        state["lastSync"] = now()
+        save_state()
+        print("Syncing complete.")
+        return 0
+    elif command == ["create", "item"] and len(args) > 2:
+        item = json.loads(base64.b64decode(args[2]))
+        item["id"] = str(uuid.uuid4())
+        item["revisionDate"] = now()
+        vault["items"].append(item)
+        with open(vault_path, "w") as f:
+            json.dump(vault, f)
+        out = item
+    else:
+        print(f"fake bw: unsupported command: {' '.join(args)}", file=sys.stderr)
+        return 1
+
+    json.dump(out, sys.stdout)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
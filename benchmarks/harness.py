@@ -0,0 +1,87 @@
+"""Offline environment for benchmarks: fake `bw` on PATH plus a daemon runner."""
+
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+from . import fake_bw, vaultgen
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@contextmanager
+def fake_environment(items: int = 1000, latency: float = 0.0, **generate_kwargs):
+    """Temp dir with a synthetic vault and a fake `bw`; yields the env for subprocesses.
+
+    The env points the daemon at its own socket and snapshot inside the temp
+    dir, so a real bw-secrets daemon is not disturbed.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        vault_path = os.path.join(tmp, "vault.json")
+        with open(vault_path, "w") as f:
+            json.dump(vaultgen.generate(items, **generate_kwargs), f)
+        bin_dir = os.path.join(tmp, "bin")
+        fake_bw.install(bin_dir)
+
+        yield dict(
+            os.environ,
+            PATH=f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}",
+            PYTHONPATH=REPO_ROOT,
+            FAKE_BW_VAULT=vault_path,
+            FAKE_BW_LATENCY=str(latency),
+            BW_SESSION="fake-session",
+            BW_SECRETS_SOCKET=os.path.join(tmp, "daemon.sock"),
+            BW_SECRETS_SNAPSHOT=os.path.join(tmp, "vault.snapshot"),
+            BW_NO_GUI="1",
+        )
+
+
+def request(sock_path: str, line: str, timeout: float = 30) -> str:
+    """Send one text-protocol request on a fresh connection."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(sock_path)
+        sock.sendall(f"{line}\n".encode())
+        data = b""
+        while not data.endswith(b"\n"):
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+    return data.decode().rstrip("\n")
+
+
+def wait_ready(sock_path: str, proc: subprocess.Popen | None = None, timeout: float = 120):
+    """Wait until the daemon answers PING."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc is not None and proc.poll() is not None:
+            raise RuntimeError(f"daemon exited with code {proc.returncode}")
+        try:
+            if request(sock_path, "PING", timeout=1) == "OK pong":
+                return
+        except OSError:
+            pass
+        time.sleep(0.005)
+    raise TimeoutError("daemon did not become ready")
+
+
+@contextmanager
+def running_daemon(env: dict, ready: bool = True):
+    """Run bw-secrets-daemon with env; yields the Popen."""
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "bw_secrets.daemon"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        if ready:
+            wait_ready(env["BW_SECRETS_SOCKET"], proc)
+        yield proc
+    finally:
+        proc.terminate()
+        proc.wait()
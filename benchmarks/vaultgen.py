@@ -0,0 +1,101 @@
+"""Synthetic Bitwarden vault generator.
+
+Produces items in the shape `bw list items` prints. Deterministic for a
+given seed.
+
+Usage:
+    python -m benchmarks.vaultgen --items 10000 [--fields 2] [--note-size 200]
+        [--duplicates 0.0] [--organizations 0] [--seed 0] -o vault.json
+"""
+
+import argparse
+import json
+import random
+import sys
+import uuid
+
+REVISION = "2026-01-01T00:00:00.000Z"
+
+
+def item_id(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def generate(
+    count: int,
+    fields: int = 2,
+    note_size: int = 200,
+    duplicates: float = 0.0,
+    organizations: int = 0,
+    seed: int = 0,
+) -> dict:
+    """Build a vault: {"items": [...], "folders": [...], "organizations": [...],
+    "collections": [...]}.
+
+    fields      - custom fields per item (besides username/password/uri)
+    note_size   - length of the notes field, 0 for none
+    duplicates  - share of items that reuse an earlier item's name
+    organizations - number of organizations (with one collection each);
+                  items are spread across personal and organization scopes
+    """
+    rng = random.Random(seed)
+    folders = [{"id": item_id(rng), "name": f"folder-{i}"} for i in range(max(1, count // 1000))]
+    orgs = [{"id": item_id(rng), "name": f"org-{i}"} for i in range(organizations)]
+    collections = [
+        {"id": item_id(rng), "name": f"collection-{i}", "organizationId": org["id"]}
+        for i, org in enumerate(orgs)
+    ]
+
+    items = []
+    for i in range(count):
+        name = f"item-{i}"
+        if i and rng.random() < duplicates:
+            name = f"item-{rng.randrange(i)}"
+        scope = rng.randrange(len(orgs) + 1)
+        org = orgs[scope - 1] if scope else None
+        item = {
+            "id": item_id(rng),
+            "organizationId": org["id"] if org else None,
+            "collectionIds": [collections[scope - 1]["id"]] if org else [],
+            "folderId": folders[i % len(folders)]["id"],
+            "type": 1,
+            "name": name,
+            "notes": "n" * note_size if note_size else None,
+            "revisionDate": REVISION,
+            "login": {
+                "username": f"user{i}@example.com",
+                "password": f"pw-{i:012d}",
+                "uris": [{"match": None, "uri": f"https://host{i}.example.com/login"}],
+            },
+            "fields": [
+                {"name": f"field-{j}", "value": f"value-{i}-{j}-{rng.getrandbits(64):016x}", "type": 0}
+                for j in range(fields)
+            ],
+        }
+        items.append(item)
+
+    return {"items": items, "folders": folders, "organizations": orgs, "collections": collections}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--fields", type=int, default=2)
+    parser.add_argument("--note-size", type=int, default=200)
+    parser.add_argument("--duplicates", type=float, default=0.0)
+    parser.add_argument("--organizations", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    args = parser.parse_args()
+
+    vault = generate(args.items, args.fields, args.note_size, args.duplicates,
+                     args.organizations, args.seed)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(vault, f)
+    else:
+        json.dump(vault, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
-SOCKET_PATH = "/tmp/bw-secrets.sock"
+import os
+
+SOCKET_PATH = os.environ.get("BW_SECRETS_SOCKET", "/tmp/bw-secrets.sock")
 VERSION = "0.3.0"
 
 __all__ = ["SOCKET_PATH", "VERSION"]
@@ -0,0 +1,92 @@
+"""Vault values in one contiguous, mlocked, zeroizable buffer.
+
+An Arena is an anonymous mmap holding every field value of one vault
+generation as UTF-8, back to back; value n spans offsets[n]:offsets[n + 1].
+Where the OS permits (RLIMIT_MEMLOCK) the pages are mlocked so they are
+not swapped out, and on Linux they are excluded from core dumps. wipe()
+zeroes and unmaps the buffer once the generation is no longer served;
+reading a value after that raises WipedError.
+"""
+
+import ctypes
+import ctypes.util
+import mmap
+import sys
+import threading
+from array import array
+
+_ZEROS = bytes(64 * 1024)
+
+
+def _libc():
+    try:
+        return ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    except OSError:
+        return None
+
+
+_LIBC = _libc()
+
+
+def _address(buf: mmap.mmap) -> int:
+    ref = ctypes.c_char.from_buffer(buf)
+    try:
+        return ctypes.addressof(ref)
+    finally:
+        del ref  # release the buffer export so the mmap can be closed
+
+
+class WipedError(ValueError):
+    """A value was read from an Arena after wipe()."""
+
+
+class Arena:
+    """Encoded values of one vault generation; get(n) decodes value n."""
+    __slots__ = ("buf", "offsets", "size", "locked", "lock")
+
+    def __init__(self, values: list[str]):
+        encoded = [value.encode() for value in values]
+        self.offsets = array("Q", [0])
+        self.size = sum(map(len, encoded))
+        self.buf = mmap.mmap(-1, max(self.size, 1))
+        self.locked = self._lock_pages()
+        if hasattr(mmap, "MADV_DONTDUMP"):
+            self.buf.madvise(mmap.MADV_DONTDUMP)
+
+        end = 0
+        for data in encoded:
+            self.buf[end:end + len(data)] = data
+            end += len(data)
+            self.offsets.append(end)
+        # Held by readers outside the event loop (snapshot writer) and by wipe()
+        self.lock = threading.Lock()
+
+    def _lock_pages(self) -> bool:
+        if _LIBC is None or sys.platform == "win32":
+            return False
+        return _LIBC.mlock(ctypes.c_void_p(_address(self.buf)), ctypes.c_size_t(len(self.buf))) == 0
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def get(self, n: int) -> str:
+        offsets = self.offsets
+        try:
+            return self.buf[offsets[n]:offsets[n + 1]].decode()
+        except (IndexError, ValueError):
+            # wipe() closes the buffer (ValueError) and resets offsets (IndexError)
+            raise WipedError("vault generation already wiped") from None
+
+    def wipe(self):
+        """Zero the buffer and unmap it; later get() calls fail."""
+        with self.lock:
+            if self.buf.closed:
+                return
+            for start in range(0, len(self.buf), len(_ZEROS)):
+                chunk = min(len(_ZEROS), len(self.buf) - start)
+                self.buf[start:start + chunk] = _ZEROS[:chunk]
+            if self.locked:
+                _LIBC.munlock(ctypes.c_void_p(_address(self.buf)), ctypes.c_size_t(len(self.buf)))
+                self.locked = False
+            self.buf.close()
+            self.offsets = array("Q", [0])
@@ -2,6 +2,255 @@ import json
 import os
 import subprocess
 import sys
+import time
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+from urllib.parse import urlsplit
+
+from .arena import Arena, WipedError
+from .search import TermIndex
+
+# Keep field values in the vault's Arena instead of Python str objects
+SEAL_VALUES = True
+
+
+class Layout:
+    """Общий для записей набор имён полей: интернированные имена и их индексы."""
+    __slots__ = ("names", "index")
+
+    _cache: dict = {}
+
+    def __init__(self, names: tuple[str, ...]):
+        self.names = names
+        self.index = {name: i for i, name in enumerate(names)}
+
+    @classmethod
+    def get(cls, names: tuple[str, ...]) -> "Layout":
+        layout = cls._cache.get(names)
+        if layout is None:
+            names = tuple(sys.intern(name) for name in names)
+            layout = cls._cache.setdefault(names, cls(names))
+        return layout
+
+
+class Item(Mapping):
+    """Компактные поля записи: ссылка на общий Layout и кортеж значений.
+
+    Вместо отдельного dict на запись хранится два слота; имена полей
+    разделяются всеми записями с тем же набором полей. Для чтения ведёт
+    себя как dict[field -> value].
+    """
+    __slots__ = ("layout", "values")
+
+    def __init__(self, layout: Layout, values: tuple[str, ...]):
+        self.layout = layout
+        self.values = values
+
+    @classmethod
+    def from_dict(cls, fields: dict) -> "Item":
+        return cls(Layout.get(tuple(fields)), tuple(fields.values()))
+
+    def __getitem__(self, field: str) -> str:
+        return self.values[self.layout.index[field]]
+
+    def __contains__(self, field) -> bool:
+        return field in self.layout.index
+
+    def __iter__(self):
+        return iter(self.layout.names)
+
+    def __len__(self) -> int:
+        return len(self.layout.names)
+
+    def __repr__(self) -> str:
+        return f"Item({dict(self)!r})"
+
+
+class ArenaItem(Item):
+    """Поля записи, значения которых лежат в Arena поколения vault.
+
+    Вместо кортежа строк хранится номер первого значения записи в arena;
+    значение поля декодируется при чтении. После Vault.wipe() чтение
+    падает с WipedError вместо возврата старых данных.
+    """
+    __slots__ = ("arena", "first")
+
+    def __init__(self, layout: Layout, arena: Arena, first: int):
+        self.layout = layout
+        self.arena = arena
+        self.first = first
+
+    def __getitem__(self, field: str) -> str:
+        # Arena.get inlined: this is the GET path
+        n = self.first + self.layout.index[field]
+        arena = self.arena
+        offsets = arena.offsets
+        try:
+            return arena.buf[offsets[n]:offsets[n + 1]].decode()
+        except (IndexError, ValueError):
+            raise WipedError("vault generation already wiped") from None
+
+    @property
+    def values(self) -> tuple[str, ...]:
+        get = self.arena.get
+        return tuple(get(n) for n in range(self.first, self.first + len(self.layout.names)))
+
+
+class Entry(NamedTuple):
+    """Разобранная запись vault вместе с ревизией, из которой она получена."""
+    revision: str | None
+    name: str
+    fields: Item
+    hosts: tuple = ()
+    folder: str | None = None
+    org: str | None = None
+
+
+class Vault:
+    """Vault в памяти: поля записей по имени плюс вторичные индексы.
+
+    Ведёт себя как dict[name -> fields]. Индексы (по id, имени, хосту URI,
+    папке и организации, имени поля, а также поисковые по именам записей, полей и
+    хостам) строятся вместе с vault и заменяются вместе с ним.
+    После загрузки хранит счётчики изменений относительно предыдущего
+    поколения.
+    """
+
+    def __init__(
+        self,
+        entries: dict[str, Entry] | None = None,
+        folders: dict[str, str] | None = None,
+        organizations: dict[str, str] | None = None,
+    ):
+        self.entries = entries or {}
+        self.folders = folders or {}
+        self.organizations = organizations or {}
+        self.arena = self.seal() if SEAL_VALUES else None
+        self.items = {}
+        self.by_name = {}
+        self.by_host = {}
+        self.by_scope = {}
+
+        for item_id, entry in self.entries.items():
+            self.items[entry.name] = entry.fields
+            self.by_name.setdefault(entry.name, []).append(item_id)
+            for host in entry.hosts:
+                self.by_host.setdefault(host, []).append(item_id)
+            scopes = {
+                entry.folder, self.folders.get(entry.folder),
+                entry.org, self.organizations.get(entry.org),
+            }
+            for scope in scopes:
+                if scope:
+                    self.by_scope.setdefault((scope, entry.name), []).append(item_id)
+
+        # Item names per field name, built per shared layout rather than per item
+        by_layout = {}
+        for name, fields in self.items.items():
+            by_layout.setdefault(fields.layout, []).append(name)
+        self.by_field = {}
+        for layout, names in by_layout.items():
+            for field in layout.names:
+                self.by_field.setdefault(field, []).extend(names)
+
+        self.name_index = TermIndex(self.items)
+        self.field_index = TermIndex(self.by_field)
+        self.host_index = TermIndex(self.by_host)
+
+        self.changed = len(self.entries)
+        self.deleted = 0
+        # (scope, seconds, items) for each `bw list items` call of the load
+        self.scope_times = []
+
+    def seal(self) -> Arena:
+        """Переложить значения всех записей в новую Arena и заменить их на ArenaItem.
+
+        Неизменённые записи, взятые из прошлого поколения, читаются из его
+        arena, поэтому она должна жить, пока новый vault не построен.
+        """
+        arena = Arena([value for entry in self.entries.values() for value in entry.fields.values])
+        first = 0
+        for item_id, entry in self.entries.items():
+            fields = ArenaItem(entry.fields.layout, arena, first)
+            first += len(fields)
+            self.entries[item_id] = entry._replace(fields=fields)
+        return arena
+
+    def wipe(self):
+        """Обнулить значения (arena) этого поколения, когда оно больше не нужно."""
+        if self.arena is not None:
+            self.arena.wipe()
+
+    @property
+    def unchanged(self) -> int:
+        return len(self.entries) - self.changed
+
+    def summary(self) -> str:
+        return f"{self.changed} changed / {self.deleted} deleted / {self.unchanged} unchanged"
+
+    def lookup(self, key: str) -> list[str]:
+        """Найти id записей по ключу: имя, `id:<uuid>`, `host:<host>` или `папка/имя`.
+
+        Папка — имя или id папки либо организации. Все формы — O(1) по
+        индексам (для `папка/имя` — по числу `/` в ключе).
+        """
+        if key in self.by_name:
+            ids = self.by_name[key]
+        elif key.startswith("id:"):
+            ids = [key[3:]] if key[3:] in self.entries else []
+        elif key.startswith("host:"):
+            ids = self.by_host.get(key[5:].lower(), [])
+        else:
+            ids = []
+            pos = key.find("/")
+            while pos != -1 and not ids:
+                ids = self.by_scope.get((key[:pos], key[pos + 1:]), [])
+                pos = key.find("/", pos + 1)
+        return ids
+
+    def search(self, query: str, limit: int = 10) -> list[tuple[str, str, str]]:
+        """Найти записи по префиксу или нечётко: (имя, "name"|"host"|"field", совпавший термин).
+
+        Совпадения по имени записи, хосту и имени поля ранжируются вместе;
+        по хосту и полю возвращаются записи, у которых они есть.
+        """
+        scored = [
+            (score, kind, term)
+            for kind, index in (("name", self.name_index), ("host", self.host_index),
+                                ("field", self.field_index))
+            for score, term in index.search(query, limit)
+        ]
+        scored.sort(key=lambda match: -match[0])
+
+        results = {}
+        for _, kind, term in scored:
+            if kind == "name":
+                names = [term]
+            elif kind == "host":
+                names = [self.entries[item_id].name for item_id in self.by_host[term]]
+            else:
+                names = self.by_field[term]
+            for name in names:
+                if len(results) >= limit:
+                    return list(results.values())
+                results.setdefault(name, (name, kind, term))
+        return list(results.values())
+
+    def __getitem__(self, name: str) -> Item:
+        return self.items[name]
+
+    def __contains__(self, name) -> bool:
+        return name in self.items
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def keys(self):
+        return self.items.keys()
 
 
 def get_session() -> str:
@@ -14,24 +263,31 @@ def get_session() -> str:
     return session
 
 
-def load_vault(session: str) -> dict:
-    """Загрузить все записи из Bitwarden vault."""
+def load_vault(session: str, previous: Vault | None = None, env: dict | None = None) -> Vault:
+    """Загрузить все записи из Bitwarden vault.
+
+    Если передан previous, заново разбираются только добавленные и
+    изменённые записи, остальные берутся из него по id и revisionDate.
+    Список папок запрашивается параллельно со списком записей.
+    env — окружение процессов `bw` (например, свой BITWARDENCLI_APPDATA_DIR).
+    """
     try:
-        result = subprocess.run(
-            ["bw", "list", "items", "--session", session],
-            capture_output=True,
+        with subprocess.Popen(
+            ["bw", "list", "folders", "--session", session],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
             text=True,
-            check=True
-        )
-        items_json = json.loads(result.stdout)
-
-        vault = {}
-        for item in items_json:
-            name, fields = parse_item(item)
-            if name:
-                vault[name] = fields
+            encoding="utf-8",
+            env=env,
+        ) as folders_proc:
+            try:
+                entries, changed = read_entries(
+                    bw_items(["list", "items", "--session", session], env), previous
+                )
+            finally:
+                folders_out = folders_proc.communicate()[0]
 
-        return vault
+        return build_vault(entries, changed, previous, folders=parse_folders(folders_out))
 
     except subprocess.CalledProcessError as e:
         print(f"ERROR: Failed to load vault: {e.stderr}", file=sys.stderr)
@@ -41,6 +297,225 @@ def load_vault(session: str) -> dict:
         sys.exit(1)
 
 
+def load_vault_parallel(
+    session: str,
+    previous: Vault | None = None,
+    by_collection: bool = False,
+    workers: int | None = None,
+    env: dict | None = None,
+) -> Vault:
+    """Загрузить vault параллельно: отдельный `bw list items` на каждую область.
+
+    Сначала запрашиваются организации, коллекции и папки, затем личные записи
+    и каждая организация (или коллекция при by_collection) загружаются в
+    своём процессе `bw` в пуле из не более чем workers потоков. Результаты
+    сливаются по id через тот же read_entries. При by_collection записи
+    организаций вне коллекций не попадают в vault.
+    """
+    workers = workers or os.cpu_count() or 4
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            organizations, collections, folders = pool.map(
+                lambda args: bw_json(args, env),
+                [
+                    ["list", "organizations", "--session", session],
+                    ["list", "collections", "--session", session],
+                    ["list", "folders", "--session", session],
+                ],
+            )
+            organizations = {o["id"]: o["name"] for o in organizations}
+            folders = {f["id"]: f["name"] for f in folders if f.get("id")}
+
+            scopes = [("personal", ["--organizationid", "null"])]
+            if by_collection:
+                for c in collections:
+                    org = organizations.get(c.get("organizationId"), c.get("organizationId"))
+                    scopes.append((f"{org}/{c['name']}", ["--collectionid", c["id"]]))
+            else:
+                for org_id, org_name in organizations.items():
+                    scopes.append((org_name, ["--organizationid", org_id]))
+
+            def load_scope(scope):
+                label, filter_args = scope
+                start = time.monotonic()
+                entries, _ = read_entries(
+                    bw_items(["list", "items", "--session", session, *filter_args], env), previous
+                )
+                return label, time.monotonic() - start, entries
+
+            results = list(pool.map(load_scope, scopes))
+
+    except subprocess.CalledProcessError as e:
+        print(f"ERROR: Failed to load vault: {e.stderr}", file=sys.stderr)
+        sys.exit(1)
+    except (json.JSONDecodeError, KeyError, TypeError) as e:
+        print(f"ERROR: Failed to parse vault JSON: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    entries = {}
+    for _, _, scope_entries in results:
+        entries.update(scope_entries)
+
+    old = previous.entries if previous else {}
+    changed = sum(1 for item_id, entry in entries.items() if old.get(item_id) is not entry)
+
+    vault = build_vault(entries, changed, previous, folders, organizations)
+    vault.scope_times = [(label, seconds, len(e)) for label, seconds, e in results]
+    return vault
+
+
+def read_vault(items, previous: Vault | None = None, folders: dict | None = None) -> Vault:
+    """Собрать vault из последовательности записей Bitwarden."""
+    entries, changed = read_entries(items, previous)
+    return build_vault(entries, changed, previous, folders=folders)
+
+
+def read_entries(items, previous: Vault | None = None) -> tuple[dict[str, Entry], int]:
+    """Разобрать записи в {id: Entry}, переиспользуя неизменённые из previous.
+
+    Возвращает записи и число заново разобранных.
+    """
+    old = previous.entries if previous else {}
+    entries = {}
+    changed = 0
+
+    for item in items:
+        if not item.get("name"):
+            continue
+        item_id = item.get("id") or item["name"]
+        revision = item.get("revisionDate")
+
+        entry = old.get(item_id)
+        if entry is None or revision is None or entry.revision != revision:
+            name, fields = parse_item(item)
+            entry = Entry(revision, name, Item.from_dict(fields), *parse_keys(item))
+            changed += 1
+        entries[item_id] = entry
+
+    return entries, changed
+
+
+def build_vault(
+    entries: dict[str, Entry],
+    changed: int,
+    previous: Vault | None = None,
+    folders: dict | None = None,
+    organizations: dict | None = None,
+) -> Vault:
+    """Построить vault с индексами и посчитать удалённые относительно previous."""
+    vault = Vault(entries, folders, organizations)
+    vault.changed = changed
+    if previous:
+        vault.deleted = sum(1 for item_id in previous.entries if item_id not in entries)
+    return vault
+
+
+def bw_json(args: list[str], env: dict | None = None):
+    """Выполнить `bw` и разобрать его JSON-вывод целиком (для небольших списков)."""
+    result = subprocess.run(
+        ["bw", *args], capture_output=True, text=True, encoding="utf-8", check=True, env=env
+    )
+    return json.loads(result.stdout)
+
+
+def parse_folders(output: str) -> dict[str, str]:
+    """Разобрать вывод `bw list folders` в {id: имя}; при ошибке — пустой dict."""
+    try:
+        return {f["id"]: f["name"] for f in json.loads(output) if f.get("id")}
+    except (ValueError, TypeError, KeyError):
+        return {}
+
+
+def bw_items(args: list[str], env: dict | None = None):
+    """Запустить `bw` и потоково отдавать записи из JSON-массива в его stdout.
+
+    Ни весь stdout, ни весь JSON-список в памяти не держатся.
+    """
+    with subprocess.Popen(
+        ["bw", *args],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        encoding="utf-8",
+        env=env,
+    ) as proc:
+        try:
+            yield from iter_items(proc.stdout)
+        except json.JSONDecodeError:
+            # Ненулевой код выхода важнее ошибки разбора
+            if proc.wait() != 0:
+                raise subprocess.CalledProcessError(
+                    proc.returncode, proc.args, stderr=proc.stderr.read()
+                )
+            raise
+        proc.stdout.read()
+        stderr = proc.stderr.read()
+
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, proc.args, stderr=stderr)
+
+
+def iter_items(stream, chunk_size: int = 65536):
+    """Инкрементально разобрать JSON-массив из stream, отдавая по одному элементу.
+
+    В буфере держится только текущая незаконченная запись и хвост чанка.
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    eof = False
+    # "[" -> начало массива, "value]" -> значение или конец,
+    # "value" -> значение после запятой, ",]" -> разделитель или конец
+    expect = "["
+    read_size = chunk_size
+
+    def fill() -> bool:
+        nonlocal buf, pos, eof
+        chunk = stream.read(read_size)
+        if not chunk:
+            eof = True
+            return False
+        buf = buf[pos:] + chunk
+        pos = 0
+        return True
+
+    while True:
+        # Пропустить пробелы; при нехватке данных дочитать
+        while pos < len(buf) and buf[pos] in " \t\r\n":
+            pos += 1
+        if pos >= len(buf):
+            if eof or not fill():
+                raise json.JSONDecodeError("Unexpected end of input", buf, pos)
+            continue
+
+        char = buf[pos]
+        if expect == "[":
+            if char != "[":
+                raise json.JSONDecodeError("Expecting '['", buf, pos)
+            expect = "value]"
+            pos += 1
+        elif char == "]" and expect in ("value]", ",]"):
+            return
+        elif expect == ",]":
+            if char != ",":
+                raise json.JSONDecodeError("Expecting ',' delimiter", buf, pos)
+            expect = "value"
+            pos += 1
+        else:
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # Запись обрезана границей чанка: дочитать и повторить
+                if eof or not fill():
+                    raise
+                read_size = min(read_size * 2, 16 * chunk_size)
+                continue
+            read_size = chunk_size
+            pos = end
+            expect = ",]"
+            yield item
+
+
 def parse_item(item: dict) -> tuple[str, dict]:
     """Распарсить одну запись Bitwarden в удобный формат."""
     name = item.get("name")
@@ -71,3 +546,17 @@ def parse_item(item: dict) -> tuple[str, dict]:
             fields[field_name] = field_value
 
     return name, fields
+
+
+def parse_keys(item: dict) -> tuple[tuple, str | None, str | None]:
+    """Ключи вторичных индексов записи: хосты всех URI, folderId, organizationId."""
+    hosts = []
+    for uri in (item.get("login") or {}).get("uris") or []:
+        value = (uri or {}).get("uri") or ""
+        try:
+            host = urlsplit(value if "://" in value else f"//{value}").hostname
+        except ValueError:
+            host = None
+        if host and host not in hosts:
+            hosts.append(host)
+    return tuple(hosts), item.get("folderId"), item.get("organizationId")
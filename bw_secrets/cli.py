@@ -8,7 +8,8 @@ import subprocess
 import sys
 import time
 
-from . import SOCKET_PATH, VERSION
+from . import SOCKET_PATH, VERSION, protocol
+from .trace import Trace, process_age
 
 
 def get_project_dir() -> str:
@@ -56,13 +57,174 @@ def save_env(env: dict):
         f.write("\n".join(lines) + "\n")
 
 
-def _send_to_socket(command: str) -> str:
-    """Send command to daemon socket."""
-    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-    sock.connect(SOCKET_PATH)
-    sock.sendall(f"{command}\n".encode())
-    response = sock.recv(65536).decode().strip()
-    sock.close()
+class DaemonConnection:
+    """Persistent connection to the daemon socket.
+
+    Many requests can be sent over one connection, and several requests
+    can be pipelined: responses come back in request order. With
+    framed=True the connection negotiates the length-prefixed protocol
+    (see protocol) together with the first requests, falling back to text
+    on a new connection if the daemon does not support it.
+    """
+
+    def __init__(self, path: str = SOCKET_PATH, framed: bool = False):
+        self.path = path
+        self._connect()
+        self.framed = False
+        # Send the FRAMED hello pipelined with the first requests
+        self.negotiate = framed
+
+    def _connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self.sock.connect(self.path)
+        except OSError:
+            self.sock.close()
+            raise
+        self.file = self.sock.makefile("rb")
+
+    def request(self, command: str | list[str]) -> str:
+        """Send one command (a line or a list of fields) and return its response."""
+        return self.pipeline([command])[0]
+
+    def pipeline(self, commands: list[str | list[str]]) -> list[str]:
+        """Send all commands at once, then read one response per command."""
+        frames = None
+        if self.negotiate:
+            self.negotiate = False
+            frames = self._encode_frames(commands)
+            self.sock.sendall(f"{protocol.HELLO}\n".encode() + frames)
+            if self.file.readline().decode().rstrip("\n") == protocol.HELLO_OK:
+                self.framed = True
+                return [self._read_frame() for _ in commands]
+            # Older daemon: it answered the hello with an error (some close the
+            # connection after one line) and cannot read the frames, start over
+            self.close()
+            self._connect()
+
+        if self.framed:
+            self.sock.sendall(frames or self._encode_frames(commands))
+            return [self._read_frame() for _ in commands]
+
+        lines = []
+        for command in commands:
+            if not isinstance(command, str):
+                if any(not part or part.split() != [part] for part in command):
+                    raise ValueError("arguments with spaces need the framed protocol "
+                                     "(restart the daemon: bw-stop && bw-start)")
+                command = " ".join(command)
+            lines.append(f"{command}\n")
+        self.sock.sendall("".join(lines).encode())
+
+        responses = []
+        for _ in commands:
+            line = self.file.readline()
+            if not line:
+                raise ConnectionResetError("daemon closed the connection")
+            responses.append(line.decode().rstrip("\n"))
+        return responses
+
+    def watch(self, items: list[str] = ()):
+        """Subscribe to vault changes (WATCH): yields one event dict per reload.
+
+        Events carry the generation and the added/changed/removed item names
+        (or "resync": true after falling behind), never values. Takes over
+        the connection; needs the text protocol.
+        """
+        if self.framed:
+            raise ValueError("WATCH needs a text protocol connection")
+        response = self.request(["WATCH", *items])
+        if not response.startswith("OK "):
+            raise RuntimeError(response)
+        for line in self.file:
+            yield json.loads(line[len("EVENT "):])
+
+    @staticmethod
+    def _encode_frames(commands: list[str | list[str]]) -> bytes:
+        return b"".join(
+            protocol.encode_request(c.split() if isinstance(c, str) else c)
+            for c in commands
+        )
+
+    def _read_exactly(self, size: int) -> bytes:
+        data = self.file.read(size)
+        if len(data) != size:
+            raise ConnectionResetError("daemon closed the connection")
+        return data
+
+    def _read_frame(self) -> str:
+        length = protocol.frame_length(self._read_exactly(4))
+        kind, fields = protocol.decode_body(self._read_exactly(length))
+        return protocol.response_text(kind, fields)
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_connection: DaemonConnection | None = None
+
+
+def _send_to_socket(command: str | list[str]) -> str:
+    """Send command to daemon socket, reusing a framed connection between calls."""
+    global _connection
+    if os.environ.get("BW_SECRETS_TRACE") == "1":
+        return _send_traced(command)
+
+    if _connection is not None:
+        try:
+            return _connection.request(command)
+        except ConnectionError:
+            # Stale connection (daemon restarted): reconnect below
+            _connection.close()
+            _connection = None
+
+    # Connection failures propagate so send_command can start the daemon
+    _connection = DaemonConnection(framed=True)
+    try:
+        return _connection.request(command)
+    except ConnectionError:
+        _connection.close()
+        _connection = None
+        return "ERROR daemon closed the connection"
+
+
+def _send_traced(command: str | list[str]) -> str:
+    """Send command with a trace id and print the client and daemon phase timings to stderr."""
+    global _connection
+    startup = process_age()
+    trace = Trace()
+    if _connection is None:
+        _connection = DaemonConnection(framed=True)
+    trace.mark("connect")
+    fields = command.split() if isinstance(command, str) else list(command)
+    response = _connection.request([f"@{trace.id}", *fields])
+    trace.mark("response")
+
+    server = _connection.request(["TRACE", trace.id])
+    server_phases = json.loads(server[3:])[0]["phases"] if server.startswith("OK [{") else []
+
+    def line(side: str, phase: str, seconds: float):
+        print(f"  {side:<7} {phase:<26} {seconds * 1e3:9.3f} ms", file=sys.stderr)
+
+    print(f"trace {trace.id} {fields[0].upper() if fields else ''}", file=sys.stderr)
+    if startup is not None:
+        line("client", "process start -> request", startup)
+    (_, connected), (_, answered) = trace.phases
+    line("client", "connect", connected)
+    line("client", "request -> response", answered - connected)
+    previous, since = "read", 0.0
+    for phase, seconds in server_phases:
+        line("daemon", f"{previous} -> {phase}", seconds - since)
+        previous, since = phase, seconds
+    if server_phases:
+        line("", "socket and event loop", answered - connected - since)
     return response
 
 
@@ -152,9 +314,11 @@ def can_show_gui() -> bool:
     return bool(os.environ.get("DISPLAY"))
 
 
-def send_command(command: str) -> str:
+def send_command(command: str | list[str]) -> str:
     """Send command to daemon via Unix socket.
 
+    A list is sent as separate fields, so arguments may contain spaces.
+
     If daemon is not running, try to start it with GUI dialog.
     """
     try:
@@ -227,27 +391,127 @@ def get_session() -> str:
     sys.exit(1)
 
 
+# Prefixes of item keys that contain ":" themselves (see daemon.find_item)
+ITEM_KEY_PREFIXES = ("id", "host")
+
+
+def parse_pair(arg: str) -> tuple[str, str] | None:
+    """Split `item:field` into (item, field); None if arg is a plain item key.
+
+    `id:<uuid>` and `host:<host>`, also after an `<account>/` prefix, are
+    item keys. A name that itself contains ":" is still split: only the
+    daemon can tell it from a pair (see daemon.split_key).
+    """
+    item, sep, field = arg.rpartition(":")
+    if not sep or not item or not field or item.rpartition("/")[2] in ITEM_KEY_PREFIXES:
+        return None
+    return item, field
+
+
 def cmd_get():
-    """CLI command: bw-get <item> [field]"""
+    """CLI command: bw-get <item> [field ...] | bw-get <item:field> ...
+
+    Several fields, or several item:field pairs, are fetched in one MGET
+    request and printed one value per line, in order.
+    """
     if len(sys.argv) < 2:
-        print("Usage: bw-get <item> [field]", file=sys.stderr)
+        print("Usage: bw-get <item> [field ...]", file=sys.stderr)
+        print("       bw-get <item:field> [<item:field> ...]", file=sys.stderr)
         print("", file=sys.stderr)
         print("Examples:", file=sys.stderr)
         print("  bw-get google password", file=sys.stderr)
         print("  bw-get openai api-key", file=sys.stderr)
+        print("  bw-get myapp username password", file=sys.stderr)
+        print("  bw-get myapp:password openai:api-key", file=sys.stderr)
         sys.exit(1)
 
-    item = sys.argv[1]
-    field = sys.argv[2] if len(sys.argv) > 2 else "password"
+    args = sys.argv[1:]
+    if len(args) == 1:
+        # `item` or `item:field`: the daemon tells an item name with ":" from a pair
+        request = ["GET", args[0]]
+    else:
+        pairs = [parse_pair(arg) for arg in args]
+        if not all(pairs):
+            pairs = [(args[0], field) for field in args[1:]]
+        request = ["GET", *pairs[0]] if len(pairs) == 1 else None
 
-    response = send_command(f"GET {item} {field}")
+    if request is not None:
+        response = send_command(request)
 
-    if response.startswith("OK "):
-        print(response[3:])
-    else:
+        if response.startswith("OK "):
+            print(response[3:])
+        else:
+            print(response, file=sys.stderr)
+            sys.exit(1)
+        return
+
+    response = send_command(["MGET", *(part for pair in pairs for part in pair)])
+    if not response.startswith("OK "):
+        print(response, file=sys.stderr)
+        sys.exit(1)
+
+    failed = False
+    for result in json.loads(response[3:]):
+        if "value" in result:
+            print(result["value"])
+        else:
+            print(f"ERROR {result['item']}:{result['field']}: {result['error']}", file=sys.stderr)
+            failed = True
+    if failed:
+        sys.exit(1)
+
+
+def read_env_specs(args: list[str]) -> list[str]:
+    """Collect ENV specs from mapping files and inline arguments.
+
+    A mapping file has one spec per line: `VAR=item:field`, `VAR=item`
+    (password) or a bare `item` (all fields); `#` starts a comment.
+    """
+    specs = []
+    for arg in args:
+        if not os.path.isfile(arg):
+            specs.append(arg)
+            continue
+        with open(arg) as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    specs.append(line.removeprefix("export ").strip())
+    return specs
+
+
+def cmd_env():
+    """CLI command: bw-env <mapfile | VAR=item:field | item> ...
+
+    Prints shell-quoted `export` lines for all requested secrets, fetched
+    in one request. For direnv: eval "$(bw-env .secrets.map)"
+    """
+    if len(sys.argv) < 2:
+        print("Usage: bw-env <mapfile | VAR=item:field | VAR=item | item> ...", file=sys.stderr)
+        print("", file=sys.stderr)
+        print("Mapping file lines: VAR=item:field, VAR=item (password) or item", file=sys.stderr)
+        print("(all fields, named as bw-fields suggests).", file=sys.stderr)
+        print("", file=sys.stderr)
+        print("Example (.envrc):", file=sys.stderr)
+        print('  eval "$(bw-env .secrets.map)"', file=sys.stderr)
+        sys.exit(1)
+
+    specs = read_env_specs(sys.argv[1:])
+    if not specs:
+        return
+
+    response = send_command(["ENV", *specs])
+    if not response.startswith("OK "):
         print(response, file=sys.stderr)
         sys.exit(1)
 
+    result = json.loads(response[3:])
+    sys.stdout.write(result["exports"])
+    for error in result["errors"]:
+        print(f"ERROR {error}", file=sys.stderr)
+    if result["errors"]:
+        sys.exit(1)
+
 
 def cmd_fields():
     """CLI command: bw-fields <item>
@@ -265,7 +529,7 @@ def cmd_fields():
         sys.exit(1)
 
     item = sys.argv[1]
-    response = send_command(f"SUGGEST {item}")
+    response = send_command(["SUGGEST", item])
 
     if response.startswith("OK "):
         data = json.loads(response[3:])
@@ -293,6 +557,56 @@ def cmd_list():
         sys.exit(1)
 
 
+def cmd_search():
+    """CLI command: bw-search <query> [limit]
+
+    Finds entries by name prefix or approximate name, login host or field name.
+    """
+    if len(sys.argv) < 2:
+        print("Usage: bw-search <query> [limit]", file=sys.stderr)
+        print("", file=sys.stderr)
+        print("Example:", file=sys.stderr)
+        print("  bw-search postgres", file=sys.stderr)
+        sys.exit(1)
+
+    response = send_command(["SEARCH", *sys.argv[1:3]])
+
+    if response.startswith("OK "):
+        for result in json.loads(response[3:]):
+            if result["match"] == "name":
+                print(result["item"])
+            else:
+                print(f"{result['item']}  ({result['match']}: {result['term']})")
+    else:
+        print(response, file=sys.stderr)
+        sys.exit(1)
+
+
+def cmd_watch():
+    """CLI command: bw-watch [item ...]
+
+    Prints a line for every reload that adds, changes or removes entries
+    (only the given ones, if any). Values are never shown.
+    """
+    try:
+        with DaemonConnection() as conn:
+            for event in conn.watch(sys.argv[1:]):
+                if event.get("resync"):
+                    print(f"[{event['generation']}] resync", flush=True)
+                    continue
+                for change in ("added", "changed", "removed"):
+                    for name in event[change]:
+                        print(f"[{event['generation']}] {change} {name}", flush=True)
+    except OSError:
+        print("ERROR daemon not running (start it with: bw-start)", file=sys.stderr)
+        sys.exit(1)
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        pass
+
+
 def cmd_reload():
     """CLI command: bw-reload (deprecated, use bw-start)"""
     response = send_command("RELOAD")
@@ -304,10 +618,29 @@ def cmd_reload():
         sys.exit(1)
 
 
+def print_stats(stats: dict):
+    """Human-readable form of the daemon STATS response."""
+    print(f"Uptime: {stats['uptime'] / 3600:.1f} h, items: {stats['vault_items']}, "
+          f"generation: {stats['vault_generation']}")
+    print(f"Connections: {stats['connections']['active']} active, "
+          f"{stats['connections']['total']} total")
+    print(f"Lookups: {stats['lookups']['hits']} hits, {stats['lookups']['misses']} misses")
+    reloads = stats["reloads"]
+    print(f"Reloads: {reloads['ok']} ok, {reloads['failed']} failed, "
+          f"{stats['reloads_coalesced']} coalesced, p50 {reloads['duration']['p50']:.2f}s")
+    print()
+    print(f"{'command':<8} {'count':>8} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for command, data in stats["commands"].items():
+        latency = data["latency"]
+        print(f"{command:<8} {data['count']:>8} {data['errors']:>7} {latency['p50'] * 1e3:>8.3f} "
+              f"{latency['p95'] * 1e3:>8.3f} {latency['p99'] * 1e3:>8.3f}")
+
+
 def cmd_status():
-    """CLI command: bw-status
+    """CLI command: bw-status [--stats [json|prometheus]]
 
     Shows daemon status, connection info, and item count.
+    With --stats shows the daemon request and reload metrics instead.
     """
     env = load_env()
     server = env.get("BW_SERVER", "https://vault.bitwarden.com")
@@ -321,23 +654,42 @@ def cmd_status():
         print(f"User: {email}")
         sys.exit(1)
 
+    if "--stats" in sys.argv[1:]:
+        fmt = sys.argv[sys.argv.index("--stats") + 1:][:1]
+        with DaemonConnection(framed=True) as conn:
+            response = conn.request(["STATS", "prometheus" if fmt == ["prometheus"] else "json"])
+        if not response.startswith("OK "):
+            print(response, file=sys.stderr)
+            sys.exit(1)
+        if fmt == ["json"] or fmt == ["prometheus"]:
+            print(response[3:].rstrip("\n"))
+        else:
+            print_stats(json.loads(response[3:]))
+        return
+
     # Try to ping daemon
     try:
-        response = _send_to_socket("PING")
+        # Ping and get item count in one round trip
+        with DaemonConnection() as conn:
+            response, info_response = conn.pipeline(["PING", "INFO"])
         if response == "OK pong":
-            # Get item count
-            list_response = _send_to_socket("LIST")
-            if list_response.startswith("OK "):
-                items = json.loads(list_response[3:])
-                item_count = len(items)
-            else:
-                item_count = "?"
+            info = json.loads(info_response[3:]) if info_response.startswith("OK ") else {}
 
             print("Status: running")
             print(f"Socket: {SOCKET_PATH}")
             print(f"Server: {server}")
             print(f"User: {email}")
-            print(f"Items: {item_count}")
+            print(f"Items: {info.get('items', '?')}")
+            if info.get("loaded_at"):
+                loaded = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(info["loaded_at"]))
+                print(f"Loaded: {loaded} (generation {info['generation']})")
+            for name, account in info.get("accounts", {}).items():
+                if name == "default":
+                    continue
+                state = f"{account['items']} items" if account["loaded_at"] else (
+                    f"not loaded ({account['error'] or 'loading'})"
+                )
+                print(f"Account {name}: {state}")
             print(f"Version: {VERSION}")
         else:
             print("Status: error")
@@ -586,14 +938,25 @@ def bw_unlock(password: str) -> tuple[str | None, str]:
         return None, "Unlock failed"
 
 
+# Seconds bw-start waits for the daemon's initial vault load
+LOAD_TIMEOUT = 120
+
+
 def start_daemon_process(session: str) -> bool:
-    """Start the daemon process with given session."""
+    """Start the daemon process with given session.
+
+    The daemon listens before the vault is loaded, so a connection alone
+    proves little: returns True once PING, which waits for the initial
+    load, is answered and the process is still alive.
+    """
     project_dir = get_project_dir()
     daemon_path = os.path.join(project_dir, ".venv", "bin", "bw-secrets-daemon")
 
-    # Kill existing daemon
+    # Kill existing daemon and wait for it to exit (it removes its socket on exit)
     subprocess.run(["pkill", "-f", "bw-secrets-daemon"], capture_output=True)
-    time.sleep(0.5)
+    wait_until(lambda: subprocess.run(
+        ["pgrep", "-f", "bw-secrets-daemon"], capture_output=True
+    ).returncode != 0, timeout=2)
 
     # Remove old socket
     if os.path.exists(SOCKET_PATH):
@@ -603,7 +966,7 @@ def start_daemon_process(session: str) -> bool:
     env = os.environ.copy()
     env["BW_SESSION"] = session
 
-    subprocess.Popen(
+    process = subprocess.Popen(
         [daemon_path],
         env=env,
         stdout=subprocess.DEVNULL,
@@ -611,13 +974,39 @@ def start_daemon_process(session: str) -> bool:
         start_new_session=True
     )
 
-    # Wait for socket
-    for _ in range(20):
-        if os.path.exists(SOCKET_PATH):
-            return True
-        time.sleep(0.25)
+    # Wait for the socket to accept connections
+    if not wait_until(lambda: process.poll() is not None or socket_accepts(), timeout=10):
+        return False
 
-    return False
+    # The daemon exits if the initial load fails, closing the connection
+    try:
+        with DaemonConnection() as conn:
+            conn.sock.settimeout(LOAD_TIMEOUT)
+            loaded = conn.request("PING") == "OK pong"
+    except OSError:
+        loaded = False
+    return loaded and process.poll() is None
+
+
+def wait_until(condition, timeout: float) -> bool:
+    """Poll condition with a backoff from 5 ms to 100 ms; False on timeout."""
+    deadline = time.monotonic() + timeout
+    delay = 0.005
+    while not condition():
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(delay)
+        delay = min(delay * 2, 0.1)
+    return True
+
+
+def socket_accepts(path: str = SOCKET_PATH) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+            return True
+        except OSError:
+            return False
 
 
 def cmd_start():
@@ -696,13 +1085,7 @@ def cmd_start():
     keychain_set("bw-secrets-session", session)
     keychain_set("bw-secrets-master", password)
 
-    # Stop existing daemon if running
-    subprocess.run(["pkill", "-f", "bw-secrets-daemon"], capture_output=True)
-    if os.path.exists(SOCKET_PATH):
-        os.unlink(SOCKET_PATH)
-    time.sleep(0.5)
-
-    # Start daemon
+    # Start daemon (stops the running one first)
     if start_daemon_process(session):
         print("Daemon started")
         print(f"Server: {server}")
@@ -1,16 +1,81 @@
 import asyncio
 import json
 import os
+import random
+import re
+import shlex
 import signal
+import socket
 import subprocess
 import sys
+import threading
+import time
+from typing import NamedTuple
 
-from . import SOCKET_PATH
-from .bitwarden import get_session, load_vault
+from . import SOCKET_PATH, protocol
+from .arena import WipedError
+from .bitwarden import Item, Vault, get_session, load_vault, load_vault_parallel
+from .cli import get_project_dir, load_env, parse_pair
+from .localdata import LocalDataError, data_path, data_revision, load_local_vault
+from .snapshot import KEY_SIZE, SNAPSHOT_PATH, SnapshotError, load_snapshot, save_snapshot
+from .stats import Stats
+from .trace import Trace, Tracer, split_trace
 
 
-vault: dict = {}
-REFRESH_INTERVAL = 3600  # 1 hour in seconds
+# Auto-refresh defaults, seconds (BW_REFRESH_* in .env)
+REFRESH_CHECK = 60  # cheap change check
+REFRESH_SYNC = 1800  # bw sync with the server
+REFRESH_JITTER = 0.1  # +-10% on every delay
+REFRESH_MAX_BACKOFF = 3600
+RELOAD_MIN_INTERVAL = 2.0  # seconds between the end of a reload and the next one
+
+
+class Limits(NamedTuple):
+    """Connection limits and deadlines (BW_MAX_CONNECTIONS etc. in .env)."""
+    max_connections: int = 64
+    queue: int = 64  # connections waiting for a slot; more are rejected
+    queue_timeout: float = 5.0  # seconds a connection may wait for a slot
+    read_timeout: float = 60.0  # for a whole request (and idle keep-alive)
+    write_timeout: float = 10.0  # for the client to take a response
+    max_request: int = protocol.MAX_REQUEST_FRAME  # bytes per line or frame
+    max_watchers: int = 64  # WATCH subscribers; they do not take connection slots
+
+    @classmethod
+    def from_settings(cls) -> "Limits":
+        default = cls()
+        return cls(
+            max_connections=int(setting("BW_MAX_CONNECTIONS", str(default.max_connections))),
+            queue=int(setting("BW_CONNECTION_QUEUE", str(default.queue))),
+            queue_timeout=float(setting("BW_QUEUE_TIMEOUT", str(default.queue_timeout))),
+            read_timeout=float(setting("BW_READ_TIMEOUT", str(default.read_timeout))),
+            write_timeout=float(setting("BW_WRITE_TIMEOUT", str(default.write_timeout))),
+            max_request=int(setting("BW_MAX_REQUEST", str(default.max_request))),
+            max_watchers=int(setting("BW_MAX_WATCHERS", str(default.max_watchers))),
+        )
+
+
+limits = Limits()
+connection_slots: asyncio.Semaphore | None = None
+connections_waiting = 0
+# Monotonic time the last connection closed (for BW_IDLE_TIMEOUT)
+idle_since = time.monotonic()
+
+# Set once the default account has a vault; requests wait for it.
+# Created by run_server on its own event loop
+vault_ready: asyncio.Event | None = None
+# Commands answered before the vault is loaded
+STARTUP_COMMANDS = {"INFO", "STATS", "TRACE"}
+# The listening socket came from the service manager, which owns its path
+socket_activated = False
+
+# Bumped on every vault swap of any account
+generation = 0
+# Serialized responses for the current generation: ("LIST",), ("SUGGEST", item)
+response_cache: dict[tuple, str] = {}
+stats = Stats()
+tracer = Tracer()
+# Snapshot writers of several generations must not each create a Keychain key
+snapshot_key_lock = threading.Lock()
 
 
 def keychain_get(service: str) -> str | None:
@@ -28,89 +93,880 @@ def keychain_get(service: str) -> str | None:
     return None
 
 
-def bw_sync_and_reload(password: str) -> dict | None:
-    """Sync vault and reload items using password."""
+def keychain_set(service: str, value: str) -> bool:
+    """Save value to macOS Keychain; False if there is no Keychain."""
     try:
-        # Unlock to get fresh session
-        env = os.environ.copy()
-        env["BW_PASSWORD"] = password
         result = subprocess.run(
-            ["bw", "unlock", "--passwordenv", "BW_PASSWORD", "--raw"],
-            capture_output=True, text=True, timeout=60, env=env
+            ["security", "add-generic-password", "-a", os.environ.get("USER", ""),
+             "-s", service, "-w", value, "-U"],
+            capture_output=True
         )
-        if result.returncode != 0 or not result.stdout.strip():
-            return None
+        return result.returncode == 0
+    except Exception:
+        return False
+
+
+def setting(key: str, default: str | None = "") -> str | None:
+    """Read a setting from the environment, falling back to ~/.secrets/.env."""
+    value = os.environ.get(key)
+    if value is None:
+        value = load_env().get(key, default)
+    return value
 
-        session = result.stdout.strip()
 
-        # Sync vault
-        subprocess.run(
-            ["bw", "sync", "--session", session],
-            capture_output=True, timeout=60
+def load(session: str, previous: Vault | None = None, env: dict | None = None) -> Vault:
+    """Load the vault with the backend and loader selected in settings.
+
+    BW_BACKEND=local reads the bw CLI data file in-process and falls back
+    to `bw` on any error. Otherwise BW_LOAD_MODE picks the bw loader:
+    single (default) - one `bw list items` call;
+    organization / collection - one call per scope in a worker pool.
+    env is the environment for `bw` (None: the daemon's own).
+    """
+    if setting("BW_BACKEND", "bw") == "local":
+        try:
+            return load_local_vault(session, previous, data_path(env))
+        except LocalDataError as e:
+            print(f"Local backend: {e}, falling back to bw", file=sys.stderr)
+
+    mode = setting("BW_LOAD_MODE", "single")
+    if mode in ("organization", "collection"):
+        workers = int(setting("BW_LOAD_WORKERS", "0")) or None
+        new_vault = load_vault_parallel(
+            session, previous, by_collection=(mode == "collection"), workers=workers, env=env
         )
+        for scope, seconds, count in new_vault.scope_times:
+            print(f"Loaded scope {scope}: {count} items in {seconds:.2f}s")
+        return new_vault
+    return load_vault(session, previous, env)
 
-        # Reload vault
-        return load_vault(session)
-    except Exception:
+
+def bw_unlock(password: str, env: dict | None = None) -> str | None:
+    """Unlock the vault with the master password; returns a fresh session."""
+    env = dict(os.environ if env is None else env)
+    env["BW_PASSWORD"] = password
+    result = subprocess.run(
+        ["bw", "unlock", "--passwordenv", "BW_PASSWORD", "--raw"],
+        capture_output=True, text=True, timeout=60, env=env
+    )
+    if result.returncode != 0 or not result.stdout.strip():
+        return None
+    return result.stdout.strip()
+
+
+def bw_sync(session: str, env: dict | None = None) -> bool:
+    result = subprocess.run(
+        ["bw", "sync", "--session", session],
+        capture_output=True, timeout=60, env=env
+    )
+    return result.returncode == 0
+
+
+def change_marker(env: dict | None = None) -> str | None:
+    """Cheap marker that changes whenever the locally synced vault does.
+
+    Counts and latest revision dates from the bw data file, or the
+    `bw sync --last` timestamp if the data file cannot be read.
+    """
+    try:
+        return data_revision(data_path(env))
+    except LocalDataError:
+        pass
+    try:
+        result = subprocess.run(
+            ["bw", "sync", "--last"], capture_output=True, text=True, timeout=30, env=env
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0:
         return None
+    return result.stdout.strip() or None
+
+
+def jittered(seconds: float, jitter: float) -> float:
+    return seconds * random.uniform(1 - jitter, 1 + jitter)
+
+
+class Store:
+    """One account's vault: the served generation plus its reload state.
+
+    The default account (name "") runs `bw` in the daemon's environment
+    with BW_SESSION. A named account has its own bw data directory
+    (BITWARDENCLI_APPDATA_DIR, logged in to its own server), session,
+    snapshot and refresh settings, and is addressed as `<name>/<item>`.
+    Accounts load and reload independently of each other.
+    """
+
+    def __init__(self, name: str = "", appdata: str | None = None):
+        self.name = name
+        self.env = None if appdata is None else dict(os.environ, BITWARDENCLI_APPDATA_DIR=appdata)
+        self.session: str | None = None
+        self.vault = Vault()
+        self.generation = 0
+        self.loaded_at: float | None = None
+        self.error: str | None = None
+        # change_marker() taken right before the current vault was loaded
+        self.loaded_marker: str | None = None
+        self.reload_running: asyncio.Task | None = None
+        self.reload_queued: asyncio.Task | None = None
+        self.reload_finished = float("-inf")
+        self.reloads_coalesced = 0
+
+    @property
+    def label(self) -> str:
+        return self.name or "default"
+
+    @property
+    def prefix(self) -> str:
+        return f"{self.name}/" if self.name else ""
+
+    def setting(self, key: str, default: str = "") -> str:
+        """Account setting BW_ACCOUNT_<NAME>_<KEY>, else the global BW_<KEY>."""
+        if self.name:
+            value = setting(f"BW_ACCOUNT_{to_env_name(self.name)}_{key[3:]}", None)
+            if value is not None:
+                return value
+        return setting(key, default)
+
+    def keychain_service(self) -> str:
+        return f"bw-secrets-master-{self.name}" if self.name else "bw-secrets-master"
+
+    def snapshot_path(self) -> str:
+        return f"{SNAPSHOT_PATH}.{self.name}" if self.name else SNAPSHOT_PATH
+
+    def snapshot_key(self, create: bool = False) -> bytes | None:
+        """Key the snapshot is encrypted with: random key in Keychain, else the session.
+
+        With create=True a missing Keychain key is generated and stored.
+        Runs in worker threads.
+        """
+        if self.setting("BW_SNAPSHOT", "1") == "0":
+            return None
+        service = f"bw-secrets-snapshot-{self.name}" if self.name else "bw-secrets-snapshot"
+        with snapshot_key_lock:
+            stored = keychain_get(service)
+            try:
+                if stored and len(bytes.fromhex(stored)) == KEY_SIZE:
+                    return bytes.fromhex(stored)
+            except ValueError:
+                pass
+            if create:
+                key = os.urandom(KEY_SIZE)
+                if keychain_set(service, key.hex()):
+                    return key
+        return self.session.encode() if self.session else None
+
+    def write_snapshot(self, snapshot: Vault):
+        """Write the encrypted vault snapshot in a worker thread."""
+        def write():
+            key = self.snapshot_key(create=True)
+            if not key:
+                return
+            try:
+                if snapshot.arena is None:
+                    save_snapshot(snapshot, key, self.snapshot_path())
+                else:
+                    # A later swap must not wipe the values while they are written
+                    with snapshot.arena.lock:
+                        save_snapshot(snapshot, key, self.snapshot_path())
+            except WipedError:
+                pass  # a newer generation writes its own snapshot
+
+        def written(future: asyncio.Future):
+            if not future.cancelled() and future.exception() is not None:
+                print(f"Snapshot ({self.label}): failed to write: {future.exception()}",
+                      file=sys.stderr)
+
+        asyncio.get_running_loop().run_in_executor(None, write).add_done_callback(written)
+
+    def read_snapshot(self) -> Vault | None:
+        """Load the vault from the encrypted snapshot, if there is a usable one."""
+        key = self.snapshot_key()
+        if not key:
+            return None
+        try:
+            return load_snapshot(key, self.snapshot_path())
+        except (SnapshotError, OSError) as e:
+            print(f"Snapshot ({self.label}): not used ({e})")
+            return None
+
+    def open_session(self) -> str:
+        """Session of a named account: BW_ACCOUNT_<NAME>_SESSION or Keychain unlock."""
+        if not self.name:
+            return get_session()
+        session = setting(f"BW_ACCOUNT_{to_env_name(self.name)}_SESSION", "")
+        if not session:
+            password = keychain_get(self.keychain_service())
+            if not password:
+                raise RuntimeError(
+                    f"no session: set BW_ACCOUNT_{to_env_name(self.name)}_SESSION "
+                    f"or store the password in Keychain as {self.keychain_service()}"
+                )
+            session = bw_unlock(password, self.env)
+            if not session:
+                raise RuntimeError("unlock failed (password may have changed)")
+        return session
+
+    def sync(self):
+        """Run `bw sync`; if the session is rejected, unlock with the Keychain password."""
+        if bw_sync(self.session, self.env):
+            return
+
+        password = keychain_get(self.keychain_service())
+        if not password:
+            raise RuntimeError("bw sync failed and no password in Keychain")
+        session = bw_unlock(password, self.env)
+        if not session or not bw_sync(session, self.env):
+            raise RuntimeError("bw sync failed (password may have changed)")
+        self.session = session
+
+    def swap(self, new_vault: Vault):
+        """Make new_vault the served generation, drop cached responses, notify WATCH clients.
+
+        The previous generation's values are zeroed in a worker thread (it
+        may have to wait for a snapshot write of that generation).
+        """
+        global generation
+
+        generation += 1
+        old_vault, self.vault = self.vault, new_vault
+        self.generation = generation
+        self.loaded_at = time.time()
+        self.error = None
+        response_cache.clear()
+        if watchers:
+            notify_watchers(self, old_vault, new_vault)
+        if old_vault is not new_vault:
+            asyncio.get_running_loop().run_in_executor(None, old_vault.wipe)
+
+    async def reload_vault(self) -> Vault:
+        """Load in a worker thread and swap the new vault in.
+
+        The load runs off the event loop, so clients keep being served from
+        the current generation until the new one is ready; the swap itself
+        happens on the loop thread.
+        """
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            try:
+                marker = await loop.run_in_executor(None, change_marker, self.env)
+                new_vault = await loop.run_in_executor(
+                    None, load, self.session, self.vault, self.env
+                )
+            except SystemExit:
+                # load_vault reports the reason on stderr and exits
+                raise RuntimeError("load failed, see daemon log") from None
+        except Exception as e:
+            stats.reload(time.perf_counter() - start, str(e))
+            if self.loaded_at is None:
+                self.error = str(e)
+            raise
+        stats.reload(time.perf_counter() - start)
+
+        self.swap(new_vault)
+        self.loaded_marker = marker
+        self.write_snapshot(new_vault)
+        return new_vault
+
+    async def reload(self) -> Vault:
+        """Reload through a single flight shared by concurrent callers.
+
+        At most one reload runs at a time. Requests arriving while one runs
+        share a single queued reload that starts after it, and no sooner than
+        BW_RELOAD_MIN_INTERVAL seconds after it finished, so every caller gets
+        a vault loaded after its request.
+        """
+        if self.reload_queued is not None:
+            self.reloads_coalesced += 1
+            return await asyncio.shield(self.reload_queued)
+
+        self.reload_queued = asyncio.create_task(self.run_queued_reload())
+        return await asyncio.shield(self.reload_queued)
+
+    async def run_queued_reload(self) -> Vault:
+        if self.reload_running is not None:
+            await asyncio.wait([self.reload_running])
+        min_interval = float(self.setting("BW_RELOAD_MIN_INTERVAL", str(RELOAD_MIN_INTERVAL)))
+        delay = self.reload_finished + min_interval - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        self.reload_queued = None
+        self.reload_running = asyncio.current_task()
+        try:
+            return await self.reload_vault()
+        finally:
+            self.reload_running = None
+            self.reload_finished = time.monotonic()
+
+    async def start(self):
+        """Background start of a named account: session, snapshot, live load.
+
+        If the session cannot be opened yet, auto_refresh and RELOAD retry it.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            await self.ensure_session()
+        except Exception as e:
+            print(f"Account {self.label}: {e}", file=sys.stderr)
+            asyncio.create_task(self.auto_refresh())
+            return
+
+        snapshot = await loop.run_in_executor(None, self.read_snapshot)
+        if snapshot is not None:
+            self.swap(snapshot)
+            print(f"Account {self.label}: {len(snapshot)} items from snapshot")
+        await self.reconcile()
+        asyncio.create_task(self.auto_refresh())
+
+    async def ensure_session(self):
+        """Open the account's session unless it is already open."""
+        if self.session is not None:
+            return
+        try:
+            self.session = await asyncio.get_running_loop().run_in_executor(None, self.open_session)
+        except Exception as e:
+            self.error = str(e)
+            raise
+        self.error = None
+
+    async def reconcile(self):
+        """Replace the snapshot-served (or empty) vault with a live load."""
+        try:
+            new_vault = await self.reload()
+        except Exception as e:
+            print(f"Reconcile ({self.label}): live load failed ({e})", file=sys.stderr)
+            return
+
+        print(f"Reconcile ({self.label}): {new_vault.summary()}")
+
+    async def auto_refresh(self):
+        """Background task: keep the vault fresh, reloading only when it changed.
+
+        Every BW_REFRESH_CHECK seconds compares change_marker() with the marker
+        of the loaded vault and reloads (incrementally) only if it differs.
+        Every BW_REFRESH_SYNC seconds runs `bw sync` first. All delays get
+        +-BW_REFRESH_JITTER; after a failure the delay doubles, up to
+        BW_REFRESH_MAX_BACKOFF.
+        """
+        loop = asyncio.get_running_loop()
+        failures = 0
+        jitter = float(self.setting("BW_REFRESH_JITTER", str(REFRESH_JITTER)))
+        next_sync = time.monotonic() + jittered(
+            float(self.setting("BW_REFRESH_SYNC", str(REFRESH_SYNC))), jitter
+        )
+
+        while True:
+            check = float(self.setting("BW_REFRESH_CHECK", str(REFRESH_CHECK)))
+            max_backoff = float(self.setting("BW_REFRESH_MAX_BACKOFF", str(REFRESH_MAX_BACKOFF)))
+            # The exponent is capped: 2 ** failures overflows a float after ~1024 failures
+            backoff = check * 2 ** min(failures, 32)
+            await asyncio.sleep(jittered(min(backoff, max(check, max_backoff)), jitter))
+
+            try:
+                # start() could not open the session: retry it with the backoff
+                reopened = self.session is None
+                await self.ensure_session()
+                synced = time.monotonic() >= next_sync
+                if synced:
+                    await loop.run_in_executor(None, self.sync)
+                    sync_interval = float(self.setting("BW_REFRESH_SYNC", str(REFRESH_SYNC)))
+                    next_sync = time.monotonic() + jittered(sync_interval, jitter)
+
+                marker = await loop.run_in_executor(None, change_marker, self.env)
+                if marker is None:
+                    # Nothing to compare with: only a fresh sync is a reason to reload
+                    changed = synced
+                else:
+                    changed = marker != self.loaded_marker
+                if changed or reopened:
+                    new_vault = await self.reload()
+                    print(f"Auto-refresh ({self.label}): reloaded {new_vault.summary()}")
+                failures = 0
+            except Exception as e:
+                failures += 1
+                print(f"Auto-refresh ({self.label}): failed ({e}), attempt {failures}",
+                      file=sys.stderr)
+
+
+stores: dict[str, Store] = {"": Store()}
+
+
+def configured_accounts() -> list[Store]:
+    """Named accounts from BW_ACCOUNTS (comma-separated) and BW_ACCOUNT_<NAME>_APPDATA."""
+    accounts = []
+    for name in setting("BW_ACCOUNTS", "").split(","):
+        name = name.strip()
+        if not name:
+            continue
+        if "/" in name or ":" in name:
+            print(f"Account {name!r}: invalid name, skipped", file=sys.stderr)
+            continue
+        if name == "default":
+            print(f"Account {name!r}: reserved for the main account, skipped", file=sys.stderr)
+            continue
+        appdata = setting(f"BW_ACCOUNT_{to_env_name(name)}_APPDATA", "") or os.path.join(
+            get_project_dir(), "accounts", name
+        )
+        accounts.append(Store(name, os.path.expanduser(appdata)))
+    return accounts
+
+
+def resolve(item: str) -> tuple[Store, str]:
+    """Split `<account>/<key>` into the account's store and key; else the default store."""
+    account, sep, key = item.partition("/")
+    if sep and account:
+        store = stores.get(account)
+        if store is not None:
+            return store, key
+    return stores[""], item
 
 
 def to_env_name(s: str) -> str:
     """Преобразовать строку в формат ENV переменной."""
-    return s.upper().replace("-", "_").replace(" ", "_")
+    return s.upper().replace("-", "_").replace(" ", "_").replace("/", "_")
+
+
+def find_item(item: str) -> Item | str:
+    """Resolve an item key to its fields, or return an ERROR response.
+
+    Besides plain names accepts `id:<uuid>`, `host:<host>` and `folder/name`,
+    each optionally prefixed with `<account>/` for a named account. A key
+    that matches several items, including a name shared by several items,
+    is ambiguous: the error lists their `id:` keys.
+    """
+    store, key = resolve(item)
+    vault = store.vault
+    if len(vault.by_name.get(key, ())) == 1:
+        return vault[key]
+    if store.loaded_at is None and key not in vault:
+        return f"ERROR account {store.label} not loaded: {store.error or 'loading'}"
+
+    ids = vault.lookup(key)
+    if not ids:
+        return f"ERROR item not found: {item}{did_you_mean(store, key)}"
+    if len(ids) > 1:
+        matches = ", ".join(f"{store.prefix}id:{item_id}" for item_id in ids)
+        return f"ERROR ambiguous item: {item} (matches: {matches})"
+    return vault.entries[ids[0]].fields
+
+
+def split_key(key: str) -> tuple[str, str]:
+    """(item, field) for `item:field`; (key, "password") if the whole key is an item.
+
+    Item names may contain ":" themselves (`db:prod`), so an existing item
+    wins over the split.
+    """
+    pair = parse_pair(key)
+    if pair is not None:
+        store, name = resolve(key)
+        if name not in store.vault and not store.vault.lookup(name):
+            return pair
+    return key, "password"
+
+
+def did_you_mean(store: Store, key: str) -> str:
+    """` (did you mean: a, b)` with the closest item names or hosts, or ''."""
+    if key.startswith("id:"):
+        return ""
+    if key.startswith("host:"):
+        matches = [f"{store.prefix}host:{host}"
+                   for _, host in store.vault.host_index.search(key[5:], 3)]
+    else:
+        matches = [store.prefix + name for _, name in store.vault.name_index.search(key, 3)]
+    return f" (did you mean: {', '.join(matches)})" if matches else ""
+
+
+def env_names(item: str, fields) -> dict[str, str]:
+    """Suggested ENV variable name for every field of an item (as in SUGGEST)."""
+    return {f"{to_env_name(item)}_{to_env_name(name)}": name for name in fields.keys()}
+
+
+ENV_VAR_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+
+def render_env(specs: list[str]) -> dict:
+    """Build shell-quoted `export` lines for ENV specs.
+
+    A spec is `VAR=item:field`, `VAR=item` (password) or a bare `item`
+    (every field, named as SUGGEST does). Returns {"exports": str, "errors": [...]}.
+    """
+    lines = []
+    errors = []
+
+    for spec in specs:
+        var, sep, key = spec.partition("=")
+        if not sep:
+            fields = find_item(spec)
+            if isinstance(fields, str):
+                errors.append(f"{spec}: {fields[6:]}")
+                continue
+            wanted = [(var, spec, field) for var, field in env_names(spec, fields).items()]
+        else:
+            item, field = split_key(key)
+            wanted = [(var, item, field)]
+
+        for var, item, field in wanted:
+            if not ENV_VAR_RE.fullmatch(var):
+                errors.append(f"{spec}: invalid variable name: {var}")
+                continue
+            response = get_field(item, field)
+            if response.startswith("OK "):
+                lines.append(f"export {var}={shlex.quote(response[3:])}")
+            else:
+                errors.append(f"{spec}: {response[6:]}")
+
+    return {"exports": "".join(f"{line}\n" for line in lines), "errors": errors}
+
+
+def get_field(item: str, field: str) -> str:
+    """Response for one item field: `OK <value>` or `ERROR <reason>`."""
+    fields = find_item(item)
+    if isinstance(fields, str):
+        stats.misses += 1
+        return fields
+    if field not in fields:
+        stats.misses += 1
+        available = ", ".join(fields.keys())
+        return f"ERROR field not found: {field} (available: {available})"
+
+    stats.hits += 1
+    return f"OK {fields[field]}"
+
+
+class Watcher:
+    """A WATCH connection: the items it follows (None for all) and its pending events."""
+
+    def __init__(self, items: list[str]):
+        self.items = set(items) or None
+        self.events: asyncio.Queue = asyncio.Queue(WATCH_QUEUE)
+
+    def notify(self, event: dict):
+        if self.items is not None:
+            event = {
+                key: [name for name in value if name in self.items] if isinstance(value, list) else value
+                for key, value in event.items()
+            }
+            if not (event["added"] or event["changed"] or event["removed"]):
+                return
+        try:
+            self.events.put_nowait(event)
+        except asyncio.QueueFull:
+            # The client fell behind: replace the backlog with one "re-read everything"
+            while not self.events.empty():
+                self.events.get_nowait()
+            self.events.put_nowait({"generation": event["generation"], "resync": True})
+
+
+WATCH_QUEUE = 100  # events kept for a slow WATCH client before it gets a resync
+watchers: set[Watcher] = set()
+
+
+def vault_changes(old: Vault, new: Vault) -> tuple[list[str], list[str], list[str]]:
+    """Names added, changed (any field value or the field set) and removed between two vaults."""
+    old_items, new_items = old.items, new.items
+    added = [name for name in new_items if name not in old_items]
+    removed = [name for name in old_items if name not in new_items]
+    changed = []
+    for name, fields in new_items.items():
+        previous = old_items.get(name)
+        if previous is not None and previous is not fields and (
+            previous.layout is not fields.layout or previous.values != fields.values
+        ):
+            changed.append(name)
+    return added, changed, removed
+
+
+def notify_watchers(store: Store, old: Vault, new: Vault):
+    """Push what a swap changed in store to every WATCH client (names only)."""
+    added, changed, removed = vault_changes(old, new)
+    if not (added or changed or removed):
+        return
+    event = {
+        "generation": store.generation,
+        "account": store.label,
+        "added": sorted(store.prefix + name for name in added),
+        "changed": sorted(store.prefix + name for name in changed),
+        "removed": sorted(store.prefix + name for name in removed),
+    }
+    for watcher in watchers:
+        watcher.notify(event)
+
+
+async def serve_watch(reader, writer, items: list[str]):
+    """Push EVENT lines for vault changes until the client disconnects.
+
+    A WATCH connection is exempt from the read deadline; anything the
+    client sends is ignored, EOF ends the subscription.
+    """
+    async def wait_eof():
+        while await reader.read(65536):
+            pass
+
+    watcher = Watcher(items)
+    watchers.add(watcher)
+    closed = asyncio.ensure_future(wait_eof())
+    try:
+        while True:
+            event = asyncio.ensure_future(watcher.events.get())
+            done, _ = await asyncio.wait({event, closed}, return_when=asyncio.FIRST_COMPLETED)
+            if event not in done:
+                event.cancel()
+                return
+            writer.write(f"EVENT {json.dumps(event.result())}\n".encode())
+            await flush(writer)
+    finally:
+        watchers.discard(watcher)
+        closed.cancel()
+
+
+async def acquire_slot() -> bool:
+    """Take a connection slot, waiting in a bounded queue; False if rejected."""
+    global connections_waiting
+
+    if not connection_slots.locked():
+        await connection_slots.acquire()
+        return True
+    if connections_waiting >= limits.queue:
+        return False
+
+    connections_waiting += 1
+    stats.connections_queued += 1
+    try:
+        await asyncio.wait_for(connection_slots.acquire(), limits.queue_timeout)
+        return True
+    except asyncio.TimeoutError:
+        return False
+    finally:
+        connections_waiting -= 1
+
+
+async def read(awaitable):
+    """Await a read with the read deadline (counted in stats on timeout)."""
+    try:
+        return await asyncio.wait_for(awaitable, limits.read_timeout)
+    except asyncio.TimeoutError:
+        stats.read_timeouts += 1
+        raise
+
+
+async def flush(writer):
+    """Drain the writer with the write deadline (counted in stats on timeout)."""
+    try:
+        await asyncio.wait_for(writer.drain(), limits.write_timeout)
+    except asyncio.TimeoutError:
+        stats.write_timeouts += 1
+        raise
 
 
 async def handle_client(reader, writer):
-    """Обработать одно подключение клиента."""
+    """Обработать подключение клиента.
+
+    Соединение держится открытым, пока клиент его не закроет: запросы идут
+    построчно, ответы пишутся в том же порядке, так что клиент может
+    отправлять запросы конвейером, не дожидаясь ответов. Строка
+    `FRAMED <version>` переключает соединение на протокол с фреймами.
+
+    Одновременно обслуживается не больше limits.max_connections соединений,
+    остальные ждут в ограниченной очереди или получают отказ. Запрос должен
+    прийти за read_timeout, ответ — уйти за write_timeout, иначе соединение
+    закрывается; строка длиннее max_request отклоняется.
+
+    `WATCH [item ...]` превращает соединение в подписку на изменения vault
+    (см. serve_watch). Подписка освобождает слот соединения: подписчиков
+    ограничивает отдельный лимит limits.max_watchers.
+    """
+    stats.connections_total += 1
+    if not await acquire_slot():
+        stats.connections_rejected += 1
+        writer.write(b"ERROR server busy\n")
+        writer.close()
+        return
+
+    stats.connections_active += 1
+    slot_held = True
     try:
-        data = await reader.readline()
-        request = data.decode().strip()
+        while True:
+            try:
+                data = await read(reader.readline())
+            except ValueError:
+                # Строка длиннее лимита StreamReader
+                stats.oversized_requests += 1
+                writer.write(f"ERROR request too large (max {limits.max_request} bytes)\n".encode())
+                await flush(writer)
+                break
+            if not data:
+                break
 
-        if request:
-            response = process_request(request)
-        else:
-            response = "ERROR empty request"
+            received = time.perf_counter()
+            try:
+                request = data.decode().strip()
+            except UnicodeDecodeError:
+                # Строки разделены по \n, следующий запрос читается как обычно
+                writer.write(b"ERROR request is not valid UTF-8\n")
+                await flush(writer)
+                continue
+            trace = None
+            if request.upper().startswith("FRAMED"):
+                if request.split()[1:] == [str(protocol.VERSION)]:
+                    writer.write(f"{protocol.HELLO_OK}\n".encode())
+                    await flush(writer)
+                    await serve_framed(reader, writer)
+                    break
+                response = f"ERROR unsupported protocol: {request} (supported: {protocol.HELLO})"
+            elif request.upper().split()[:1] == ["WATCH"]:
+                if len(watchers) >= limits.max_watchers:
+                    stats.watchers_rejected += 1
+                    response = f"ERROR too many watchers (max {limits.max_watchers})"
+                else:
+                    # Subscribers may stay for hours: do not keep lookups waiting for the slot
+                    connection_slots.release()
+                    slot_held = False
+                    writer.write(f"OK watching generation {generation}\n".encode())
+                    await flush(writer)
+                    await serve_watch(reader, writer, request.split()[1:])
+                    break
+            else:
+                trace_id, request = split_trace(request)
+                trace = tracer.start(trace_id, received)
+                try:
+                    if request:
+                        response = await process_request(request, trace)
+                    else:
+                        response = "ERROR empty request"
+                except Exception as e:
+                    response = f"ERROR {str(e)}"
 
-        writer.write(f"{response}\n".encode())
-        await writer.drain()
+            writer.write(f"{response}\n".encode())
+            if trace is not None:
+                # Handed to the transport (a Unix socket send is attempted right away)
+                trace.mark("write")
+                tracer.finish(trace)
+            await flush(writer)
 
-    except Exception as e:
-        error_msg = f"ERROR {str(e)}\n"
-        writer.write(error_msg.encode())
-        await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+        pass
 
     finally:
+        global idle_since
+        stats.connections_active -= 1
+        if not stats.connections_active:
+            idle_since = time.monotonic()
+        if slot_held:
+            connection_slots.release()
+        if writer.transport.get_write_buffer_size():
+            # Клиент не читает ответы: не ждать, пока он их заберёт
+            writer.transport.abort()
         writer.close()
-        await writer.wait_closed()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
 
 
-def process_request(request: str) -> str:
-    """Обработать команду от клиента."""
-    global vault
+async def serve_framed(reader, writer):
+    """Serve length-prefixed frames (see protocol) until the client disconnects."""
+    while True:
+        try:
+            header = await read(reader.readexactly(4))
+        except asyncio.IncompleteReadError as e:
+            if e.partial:
+                raise
+            return
+
+        try:
+            length = protocol.frame_length(header, limits.max_request)
+            kind, fields = protocol.decode_body(await read(reader.readexactly(length)))
+            received = time.perf_counter()
+            if kind != protocol.REQUEST:
+                raise protocol.ProtocolError(f"unexpected frame kind: {kind}")
+        except protocol.ProtocolError as e:
+            if isinstance(e, protocol.FrameTooLarge):
+                stats.oversized_requests += 1
+            # Framing is lost, nothing more can be read from this connection
+            writer.writelines(protocol.encode_response(f"ERROR {e}"))
+            await flush(writer)
+            return
+
+        trace = None
+        try:
+            trace_id, parts = split_trace([field.decode() for field in fields])
+            trace = tracer.start(trace_id, received)
+            response = await process_request(parts, trace)
+        except Exception as e:
+            response = f"ERROR {str(e)}"
+
+        writer.writelines(protocol.encode_response(response))
+        if trace is not None:
+            trace.mark("write")
+            tracer.finish(trace)
+        await flush(writer)
 
-    parts = request.split()
+
+COMMANDS = {
+    "PING", "GET", "MGET", "SUGGEST", "ENV", "LIST", "SEARCH", "INFO", "STATS", "RELOAD",
+    "WATCH", "TRACE",
+}
+
+
+async def process_request(request: str | list[str], trace: Trace | None = None) -> str:
+    """Обработать команду от клиента: строку или готовые поля фрейма.
+
+    Время и исход каждой команды учитываются в stats, а если запрос
+    трассируется — ещё и в trace.
+    """
+    parts = request.split() if isinstance(request, str) else request
     if not parts:
         return "ERROR empty request"
 
     cmd = parts[0].upper()
+    if not vault_ready.is_set() and cmd not in STARTUP_COMMANDS:
+        # Socket is served before the initial load finishes: queue until it does
+        await vault_ready.wait()
+    start = time.perf_counter()
+    response = "ERROR"
+    try:
+        response = await run_command(cmd, parts)
+        return response
+    finally:
+        command = cmd if cmd in COMMANDS else "UNKNOWN"
+        stats.request(command, time.perf_counter() - start, response.startswith("ERROR"))
+        if trace is not None:
+            trace.command = command
+            trace.mark("command")
+
 
+async def run_command(cmd: str, parts: list[str]) -> str:
+    """Выполнить команду cmd с аргументами parts[1:]."""
     if cmd == "PING":
         return "OK pong"
 
     elif cmd == "GET":
         if len(parts) < 2:
-            return "ERROR usage: GET <item> [field]"
+            return "ERROR usage: GET <item> [field] | GET <item:field>"
 
-        item = parts[1]
-        field = parts[2] if len(parts) > 2 else "password"
+        if len(parts) > 2:
+            item, field = parts[1], parts[2]
+        else:
+            item, field = split_key(parts[1])
+
+        return get_field(item, field)
+
+    elif cmd == "MGET":
+        pairs = parts[1:]
+        if not pairs or len(pairs) % 2:
+            return "ERROR usage: MGET <item> <field> [<item> <field> ...]"
 
-        if item not in vault:
-            return f"ERROR item not found: {item}"
-        if field not in vault[item]:
-            available = ", ".join(vault[item].keys())
-            return f"ERROR field not found: {field} (available: {available})"
+        results = []
+        for item, field in zip(pairs[::2], pairs[1::2]):
+            response = get_field(item, field)
+            if response.startswith("OK "):
+                results.append({"item": item, "field": field, "value": response[3:]})
+            else:
+                results.append({"item": item, "field": field, "error": response[6:]})
 
-        return f"OK {vault[item][field]}"
+        return f"OK {json.dumps(results)}"
 
     elif cmd == "SUGGEST":
         if len(parts) < 2:
@@ -118,93 +974,284 @@ def process_request(request: str) -> str:
 
         item = parts[1]
 
-        if item not in vault:
-            return f"ERROR item not found: {item}"
+        cached = response_cache.get(("SUGGEST", item))
+        if cached is not None:
+            return cached
 
-        suggestions = {}
-        for field_name in vault[item].keys():
-            env_var = f"{to_env_name(item)}_{to_env_name(field_name)}"
-            suggestions[env_var] = f"bw-get {item} {field_name}"
+        fields = find_item(item)
+        if isinstance(fields, str):
+            return fields
+
+        suggestions = {
+            env_var: f"bw-get {item} {field_name}"
+            for env_var, field_name in env_names(item, fields).items()
+        }
+
+        response = response_cache[("SUGGEST", item)] = f"OK {json.dumps(suggestions)}"
+        return response
+
+    elif cmd == "ENV":
+        if len(parts) < 2:
+            return "ERROR usage: ENV <VAR=item:field | VAR=item | item> ..."
 
-        return f"OK {json.dumps(suggestions)}"
+        return f"OK {json.dumps(render_env(parts[1:]))}"
 
     elif cmd == "LIST":
-        items = sorted(vault.keys())
-        return f"OK {json.dumps(items)}"
+        cached = response_cache.get(("LIST",))
+        if cached is None:
+            items = [
+                store.prefix + name for store in stores.values() for name in sorted(store.vault.keys())
+            ]
+            cached = response_cache[("LIST",)] = f"OK {json.dumps(items)}"
+        return cached
+
+    elif cmd == "SEARCH":
+        if len(parts) < 2:
+            return "ERROR usage: SEARCH <query> [limit]"
+
+        if len(parts) > 2 and not (parts[2].isascii() and parts[2].isdigit() and int(parts[2]) > 0):
+            return "ERROR usage: SEARCH <query> [limit]"
+        limit = min(int(parts[2]), 100) if len(parts) > 2 else 10
+        store, query = resolve(parts[1])
+        searched = [store] if store.name else stores.values()
+        results = [
+            {"item": store.prefix + name, "match": kind, "term": term}
+            for store in searched
+            for name, kind, term in store.vault.search(query, limit)
+        ]
+        return f"OK {json.dumps(results[:limit])}"
+
+    elif cmd == "INFO":
+        default = stores[""]
+        info = {
+            "items": sum(len(store.vault) for store in stores.values()),
+            "generation": generation,
+            "loaded_at": default.loaded_at,
+            "reloads_coalesced": sum(store.reloads_coalesced for store in stores.values()),
+            "accounts": {
+                store.label: {
+                    "items": len(store.vault),
+                    "generation": store.generation,
+                    "loaded_at": store.loaded_at,
+                    "error": store.error,
+                    "arena": None if store.vault.arena is None else {
+                        "bytes": store.vault.arena.size,
+                        "locked": store.vault.arena.locked,
+                    },
+                }
+                for store in stores.values()
+            },
+        }
+        return f"OK {json.dumps(info)}"
+
+    elif cmd == "STATS":
+        gauges = {
+            "vault_items": sum(len(store.vault) for store in stores.values()),
+            "vault_generation": generation,
+            "reloads_coalesced": sum(store.reloads_coalesced for store in stores.values()),
+            "watchers": len(watchers),
+        }
+        if len(parts) > 1 and parts[1].lower() == "prometheus":
+            return f"OK {stats.prometheus(**gauges)}"
+        return f"OK {json.dumps(stats.to_dict(**gauges))}"
+
+    elif cmd == "TRACE":
+        return f"OK {json.dumps(tracer.dump(parts[1] if len(parts) > 1 else None))}"
+
+    elif cmd == "WATCH":
+        # Served by handle_client, which hands the whole connection over to it
+        return "ERROR WATCH needs a text protocol connection of its own"
 
     elif cmd == "RELOAD":
+        # The main account is stores[""], addressed as "default"
+        names = ["" if name == "default" else name for name in parts[1:]] or list(stores)
+        unknown = [name for name in names if name not in stores]
+        if unknown:
+            return f"ERROR unknown account: {', '.join(unknown)}"
+
+        targets = [stores[name] for name in names]
+        results = await asyncio.gather(
+            *(reload_account(store) for store in targets), return_exceptions=True
+        )
+        if all(isinstance(result, BaseException) for result in results):
+            return f"ERROR reload failed: {'; '.join(str(result) for result in results)}"
+        if len(targets) == 1:
+            return f"OK reloaded {results[0].summary()}"
+        summaries = [
+            f"{store.label}: "
+            + (f"failed ({result})" if isinstance(result, BaseException) else result.summary())
+            for store, result in zip(targets, results)
+        ]
+        return f"OK reloaded {'; '.join(summaries)}"
+
+    return f"ERROR unknown command: {cmd}"
+
+
+async def reload_account(store: Store) -> Vault:
+    if store.session is None:
+        if store.error is None:
+            raise RuntimeError(f"account {store.label} not available: starting")
+        # start() failed to open the session: try again now
         try:
-            session = get_session()
-            vault = load_vault(session)
-            return f"OK reloaded {len(vault)} items"
+            await store.ensure_session()
         except Exception as e:
-            return f"ERROR reload failed: {str(e)}"
+            raise RuntimeError(f"account {store.label} not available: {e}") from None
+    return await store.reload()
 
-    return f"ERROR unknown command: {cmd}"
 
+def inherited_socket() -> socket.socket | None:
+    """Listening socket passed in by the service manager, if any.
 
-async def auto_refresh():
-    """Background task: refresh vault every hour using Keychain password."""
-    global vault
+    systemd-style: LISTEN_FDS sockets starting at fd 3, addressed to this
+    process by LISTEN_PID. launchd: the socket named BW_LAUNCHD_SOCKET in
+    the job's Sockets dictionary, checked in with launch_activate_socket().
+    """
+    if os.environ.get("LISTEN_PID") == str(os.getpid()) and int(os.environ.get("LISTEN_FDS", "0")) > 0:
+        for key in ("LISTEN_PID", "LISTEN_FDS", "LISTEN_FDNAMES"):
+            os.environ.pop(key, None)  # not for the bw subprocesses
+        fd = 3
+    elif name := setting("BW_LAUNCHD_SOCKET", ""):
+        fd = launchd_socket(name)
+        if fd is None:
+            return None
+    else:
+        return None
 
-    while True:
-        await asyncio.sleep(REFRESH_INTERVAL)
+    sock = socket.socket(fileno=fd)
+    if sock.family != socket.AF_UNIX or sock.type != socket.SOCK_STREAM:
+        raise RuntimeError(f"inherited fd {fd} is not a Unix stream socket")
+    sock.setblocking(False)
+    return sock
 
-        password = keychain_get("bw-secrets-master")
-        if not password:
-            print("Auto-refresh: no password in Keychain, skipping")
-            continue
 
-        print("Auto-refresh: syncing vault...")
-        new_vault = bw_sync_and_reload(password)
+def launchd_socket(name: str) -> int | None:
+    """First fd of the launchd socket `name` (macOS), None if not activated."""
+    import ctypes
 
-        if new_vault:
-            vault = new_vault
-            print(f"Auto-refresh: reloaded {len(vault)} items")
-        else:
-            print("Auto-refresh: failed to reload (password may have changed)")
+    try:
+        libc = ctypes.CDLL(None)
+        activate = libc.launch_activate_socket
+    except (OSError, AttributeError):
+        return None
+    fds = ctypes.POINTER(ctypes.c_int)()
+    count = ctypes.c_size_t()
+    if activate(name.encode(), ctypes.byref(fds), ctypes.byref(count)) or not count.value:
+        return None
+    fd = fds[0]
+    libc.free(fds)
+    return fd
 
 
-async def run_server():
-    """Запустить Unix socket сервер."""
-    global vault
+async def exit_when_idle(serving: asyncio.Task, timeout: float):
+    """Stop serving once no client has been connected for timeout seconds."""
+    while True:
+        if stats.connections_active:
+            await asyncio.sleep(timeout)
+            continue
+        remaining = idle_since + timeout - time.monotonic()
+        if remaining <= 0:
+            print(f"Idle for {timeout:g}s, exiting")
+            serving.cancel()
+            return
+        await asyncio.sleep(remaining)
 
-    # Удалить старый socket если есть
-    if os.path.exists(SOCKET_PATH):
-        os.unlink(SOCKET_PATH)
 
-    # Загрузить vault
-    session = get_session()
-    vault = load_vault(session)
-    print(f"Loaded {len(vault)} items from Bitwarden")
+async def load_default():
+    """Load the default account: snapshot now and live in the background, or live now."""
+    default = stores[""]
+    loop = asyncio.get_running_loop()
+    snapshot = await loop.run_in_executor(None, default.read_snapshot)
+    if snapshot is not None:
+        default.swap(snapshot)
+        print(f"Loaded {len(snapshot)} items from snapshot")
+        asyncio.create_task(default.reconcile())
+    else:
+        await default.reload()
+        print(f"Loaded {len(default.vault)} items from Bitwarden")
 
-    # Запустить сервер
-    server = await asyncio.start_unix_server(
-        handle_client,
-        path=SOCKET_PATH
-    )
 
-    # Установить права (только владелец)
-    os.chmod(SOCKET_PATH, 0o600)
+async def run_server():
+    """Запустить Unix socket сервер.
 
-    print(f"Listening on {SOCKET_PATH}")
-    print(f"Auto-refresh every {REFRESH_INTERVAL // 60} minutes")
+    Сокет начинает принимать подключения сразу, до загрузки vault:
+    запросы ждут в process_request, пока не загрузится основной аккаунт.
+    Сокет может прийти готовым от systemd или launchd (см. inherited_socket),
+    тогда демон можно останавливать по простою (BW_IDLE_TIMEOUT): менеджер
+    запустит его снова при следующем подключении.
+    """
+    global limits, connection_slots, vault_ready, tracer, socket_activated
+    limits = Limits.from_settings()
+    tracer = Tracer(float(setting("BW_TRACE_SAMPLE", "0")), int(setting("BW_TRACE_BUFFER", "256")))
+    connection_slots = asyncio.Semaphore(limits.max_connections)
+    vault_ready = asyncio.Event()
+    # get_session() exits when there is no session: before the socket exists
+    stores[""].session = get_session()
+
+    sock = inherited_socket()
+    socket_activated = sock is not None
+    if socket_activated:
+        server = await asyncio.start_unix_server(handle_client, sock=sock, limit=limits.max_request)
+        print("Listening on the socket passed by the service manager")
+    else:
+        # Удалить старый socket если есть
+        if os.path.exists(SOCKET_PATH):
+            os.unlink(SOCKET_PATH)
+        server = await asyncio.start_unix_server(
+            handle_client,
+            path=SOCKET_PATH,
+            limit=limits.max_request,
+        )
+        # Установить права (только владелец)
+        os.chmod(SOCKET_PATH, 0o600)
+        print(f"Listening on {SOCKET_PATH}")
 
     # Обработка сигналов для graceful shutdown
     def handle_signal(signum, frame):
         print("\nShutting down...")
-        if os.path.exists(SOCKET_PATH):
-            os.unlink(SOCKET_PATH)
+        remove_socket()
         sys.exit(0)
 
     signal.signal(signal.SIGTERM, handle_signal)
     signal.signal(signal.SIGINT, handle_signal)
 
+    serving = asyncio.create_task(server.serve_forever())
+
+    # Основной аккаунт: из снапшота сразу, из Bitwarden в фоне
+    try:
+        await load_default()
+    except Exception as e:
+        print(f"ERROR: initial load failed: {e}", file=sys.stderr)
+        serving.cancel()
+        remove_socket()
+        sys.exit(1)
+    vault_ready.set()
+
+    # Остальные аккаунты грузятся в фоне, каждый независимо
+    for store in configured_accounts():
+        stores[store.name] = store
+        asyncio.create_task(store.start())
+
+    print(f"Auto-refresh: check every {setting('BW_REFRESH_CHECK', str(REFRESH_CHECK))}s, "
+          f"sync every {setting('BW_REFRESH_SYNC', str(REFRESH_SYNC))}s")
+
     # Start auto-refresh background task
-    asyncio.create_task(auto_refresh())
+    asyncio.create_task(stores[""].auto_refresh())
+
+    idle_timeout = float(setting("BW_IDLE_TIMEOUT", "0"))
+    if idle_timeout > 0:
+        asyncio.create_task(exit_when_idle(serving, idle_timeout))
 
-    async with server:
-        await server.serve_forever()
+    try:
+        await serving
+    except asyncio.CancelledError:
+        pass
+    remove_socket()
+
+
+def remove_socket():
+    """Remove the socket file, unless the service manager owns it."""
+    if not socket_activated and os.path.exists(SOCKET_PATH):
+        os.unlink(SOCKET_PATH)
 
 
 def main():
@@ -213,10 +1260,10 @@ def main():
         asyncio.run(run_server())
     except KeyboardInterrupt:
         print("\nShutting down...")
-        if os.path.exists(SOCKET_PATH):
-            os.unlink(SOCKET_PATH)
+        remove_socket()
     except Exception as e:
         print(f"ERROR: {e}", file=sys.stderr)
+        remove_socket()
         sys.exit(1)
 
 
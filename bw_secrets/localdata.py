@@ -0,0 +1,307 @@
+"""In-process reader for the bw CLI's local data file.
+
+Reads `data.json` of the Bitwarden CLI and decrypts items with the session
+key, without spawning Node. Produces the same raw item shape as
+`bw list items`, so items go through the usual parse_item path. Only items
+whose revisionDate changed since the previous generation are decrypted.
+
+Needs the optional `cryptography` package (pip install 'bw-secrets[local]').
+"""
+
+import base64
+import functools
+import hashlib
+import hmac
+import json
+import os
+import sys
+
+from .bitwarden import Entry, Item, Vault, build_vault, parse_item, parse_keys
+
+
+class LocalDataError(Exception):
+    """Local data file is missing, unsupported or cannot be decrypted."""
+
+
+def data_path(env: dict | None = None) -> str:
+    """Path of the bw CLI data file (BITWARDENCLI_APPDATA_DIR in env or the OS default)."""
+    appdata = (os.environ if env is None else env).get("BITWARDENCLI_APPDATA_DIR")
+    if not appdata:
+        home = os.path.expanduser("~")
+        if sys.platform == "darwin":
+            appdata = os.path.join(home, "Library", "Application Support", "Bitwarden CLI")
+        elif sys.platform == "win32":
+            appdata = os.path.join(os.environ.get("APPDATA", home), "Bitwarden CLI")
+        else:
+            config = os.environ.get("XDG_CONFIG_HOME") or os.path.join(home, ".config")
+            appdata = os.path.join(config, "Bitwarden CLI")
+    return os.path.join(appdata, "data.json")
+
+
+@functools.cache
+def _crypto():
+    try:
+        from cryptography.hazmat.primitives import hashes, padding, serialization
+        from cryptography.hazmat.primitives.asymmetric import padding as asym_padding
+        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+    except ImportError:
+        raise LocalDataError(
+            "local backend needs the 'cryptography' package: pip install 'bw-secrets[local]'"
+        ) from None
+    return hashes, padding, serialization, asym_padding, Cipher, algorithms, modes
+
+
+def _aes_decrypt(key: bytes, iv: bytes, data: bytes) -> bytes:
+    _, padding, _, _, Cipher, algorithms, modes = _crypto()
+    decryptor = Cipher(algorithms.AES(key), modes.CBC(iv)).decryptor()
+    unpadder = padding.PKCS7(128).unpadder()
+    plain = decryptor.update(data) + decryptor.finalize()
+    return unpadder.update(plain) + unpadder.finalize()
+
+
+def _check_mac(mac_key: bytes, iv: bytes, data: bytes, mac: bytes):
+    expected = hmac.new(mac_key, iv + data, hashlib.sha256).digest()
+    if not hmac.compare_digest(expected, mac):
+        raise LocalDataError("MAC mismatch (wrong key?)")
+
+
+def decrypt_bytes(enc: str, key: bytes) -> bytes:
+    """Decrypt an EncString (`2.iv|data|mac` or legacy `0.iv|data`)."""
+    enc_type, _, payload = enc.partition(".")
+    parts = [base64.b64decode(p) for p in payload.split("|")]
+    if enc_type == "2" and len(parts) == 3 and len(key) == 64:
+        iv, data, mac = parts
+        _check_mac(key[32:], iv, data, mac)
+        return _aes_decrypt(key[:32], iv, data)
+    if enc_type == "0" and len(parts) == 2:
+        iv, data = parts
+        return _aes_decrypt(key[:32], iv, data)
+    raise LocalDataError(f"unsupported cipher string type: {enc_type}")
+
+
+def decrypt_str(enc: str | None, key: bytes) -> str | None:
+    if enc is None:
+        return None
+    return decrypt_bytes(enc, key).decode("utf-8")
+
+
+def decrypt_protected(value: str, session_key: bytes) -> bytes:
+    """Decrypt a `__PROTECTED__` value (EncArrayBuffer: type|iv|mac|data, base64)."""
+    raw = base64.b64decode(value)
+    if len(raw) < 49 or raw[0] != 2:
+        raise LocalDataError("unsupported protected value")
+    iv, mac, data = raw[1:17], raw[17:49], raw[49:]
+    _check_mac(session_key[32:], iv, data, mac)
+    return _aes_decrypt(session_key[:32], iv, data)
+
+
+def _as_key(plain: bytes) -> bytes:
+    """A decrypted key is raw 64 bytes or its base64 (possibly JSON-quoted)."""
+    if len(plain) == 64:
+        return plain
+    text = plain.decode("utf-8", "replace").strip()
+    if text.startswith('"'):
+        text = json.loads(text)
+    key = base64.b64decode(text)
+    if len(key) != 64:
+        raise LocalDataError("unexpected key length")
+    return key
+
+
+def _rsa_decrypt(enc: str, private_key) -> bytes:
+    hashes, _, _, asym_padding, _, _, _ = _crypto()
+    enc_type, _, payload = enc.partition(".")
+    if enc_type not in ("3", "4", "5", "6"):
+        raise LocalDataError(f"unsupported organization key type: {enc_type}")
+    data = base64.b64decode(payload.split("|")[0])
+    algorithm = hashes.SHA256() if enc_type in ("3", "5") else hashes.SHA1()
+    return private_key.decrypt(
+        data, asym_padding.OAEP(mgf=asym_padding.MGF1(algorithm), algorithm=algorithm, label=None)
+    )
+
+
+def read_data_file(path: str) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        raise LocalDataError(f"cannot read {path}: {e}") from None
+
+
+def active_user(data: dict) -> str:
+    user_id = data.get("global_account_activeAccountId") or data.get("activeUserId")
+    if not user_id:
+        raise LocalDataError("no active account (not logged in?)")
+    return user_id
+
+
+def read_state(data: dict, user_id: str, name: str, legacy: tuple[str, ...]):
+    """Value of `user_<id>_<name>`, or the pre-2024 per-account location."""
+    value = data.get(f"user_{user_id}_{name}")
+    if value is None:
+        value = data.get(user_id) or {}
+        for key in legacy:
+            value = (value or {}).get(key)
+    return value or {}
+
+
+CIPHERS = ("ciphers_ciphers", ("data", "ciphers", "encrypted"))
+FOLDERS = ("folder_folders", ("data", "folders", "encrypted"))
+
+_revision_cache: tuple = (None, None)
+
+
+def data_revision(path: str | None = None) -> str:
+    """Cheap change marker of the synced vault, without decrypting anything.
+
+    Item and folder counts plus their latest revisionDate for the active
+    account. The file is parsed only when its mtime or size changed.
+    """
+    global _revision_cache
+
+    path = path or data_path()
+    try:
+        st = os.stat(path)
+    except OSError as e:
+        raise LocalDataError(f"cannot read {path}: {e}") from None
+    key = (path, st.st_mtime_ns, st.st_size)
+    if _revision_cache[0] == key:
+        return _revision_cache[1]
+
+    data = read_data_file(path)
+    user_id = active_user(data)
+    marker = []
+    for name, legacy in (CIPHERS, FOLDERS):
+        records = read_state(data, user_id, name, legacy)
+        latest = max((r.get("revisionDate") or "" for r in records.values()), default="")
+        marker.append(f"{len(records)}@{latest}")
+    _revision_cache = (key, " ".join(marker))
+    return _revision_cache[1]
+
+
+class LocalData:
+    """Decrypted view of the active account in the bw CLI data file."""
+
+    def __init__(self, session: str, path: str | None = None):
+        self.path = path or data_path()
+        self.data = read_data_file(self.path)
+
+        try:
+            session_key = base64.b64decode(session)
+        except ValueError:
+            raise LocalDataError("session is not a base64 key") from None
+        if len(session_key) != 64:
+            raise LocalDataError("session is not a 64-byte key")
+
+        self.user_id = active_user(self.data)
+
+        protected = self.data.get(f"__PROTECTED__{self.user_id}_user_auto") or self.data.get(
+            "__PROTECTED__key"
+        )
+        if not protected:
+            raise LocalDataError("no session-protected user key in data file")
+        self.user_key = _as_key(decrypt_protected(protected, session_key))
+        self._org_keys = None
+
+    def _state(self, name: str, legacy: tuple[str, ...]):
+        return read_state(self.data, self.user_id, name, legacy)
+
+    @property
+    def ciphers(self) -> dict:
+        return self._state(*CIPHERS)
+
+    @property
+    def organizations(self) -> dict[str, str]:
+        orgs = self._state("organizations_organizations", ("data", "organizations"))
+        return {org_id: org.get("name", org_id) for org_id, org in orgs.items()}
+
+    @property
+    def folders(self) -> dict[str, str]:
+        folders = self._state(*FOLDERS)
+        return {
+            folder_id: decrypt_str(folder["name"], self.user_key)
+            for folder_id, folder in folders.items()
+        }
+
+    def org_key(self, org_id: str) -> bytes:
+        if self._org_keys is None:
+            self._org_keys = {}
+            enc_keys = self._state(
+                "crypto_organizationKeys", ("keys", "organizationKeys", "encrypted")
+            )
+            if enc_keys:
+                _, _, serialization, _, _, _, _ = _crypto()
+                enc_private = self._state("crypto_privateKey", ("keys", "privateKey"))
+                if isinstance(enc_private, dict):
+                    enc_private = enc_private.get("encrypted")
+                private_key = serialization.load_der_private_key(
+                    decrypt_bytes(enc_private, self.user_key), password=None
+                )
+                for key_id, enc_key in enc_keys.items():
+                    if isinstance(enc_key, dict):
+                        enc_key = enc_key.get("key")
+                    self._org_keys[key_id] = _as_key(_rsa_decrypt(enc_key, private_key))
+        try:
+            return self._org_keys[org_id]
+        except KeyError:
+            raise LocalDataError(f"no key for organization {org_id}") from None
+
+    def decrypt_cipher(self, cipher: dict) -> dict:
+        """Decrypt one cipher into the shape `bw list items` prints."""
+        key = self.org_key(cipher["organizationId"]) if cipher.get("organizationId") else self.user_key
+        if cipher.get("key"):
+            key = _as_key(decrypt_bytes(cipher["key"], key))
+
+        item = {
+            "id": cipher.get("id"),
+            "organizationId": cipher.get("organizationId"),
+            "folderId": cipher.get("folderId"),
+            "revisionDate": cipher.get("revisionDate"),
+            "name": decrypt_str(cipher.get("name"), key),
+            "notes": decrypt_str(cipher.get("notes"), key),
+            "fields": [
+                {"name": decrypt_str(f.get("name"), key), "value": decrypt_str(f.get("value"), key)}
+                for f in cipher.get("fields") or []
+            ],
+        }
+        if login := cipher.get("login"):
+            item["login"] = {
+                "username": decrypt_str(login.get("username"), key),
+                "password": decrypt_str(login.get("password"), key),
+                "uris": [
+                    {"uri": decrypt_str(u.get("uri"), key)} for u in login.get("uris") or []
+                ],
+            }
+        return item
+
+
+def load_local_vault(session: str, previous: Vault | None = None, path: str | None = None) -> Vault:
+    """Load the vault from the bw CLI data file, decrypting only changed items."""
+    old = previous.entries if previous else {}
+    entries = {}
+    changed = 0
+
+    try:
+        local = LocalData(session, path)
+        for cipher_id, cipher in local.ciphers.items():
+            if cipher.get("deletedDate"):
+                continue
+            item_id = cipher.get("id") or cipher_id
+            revision = cipher.get("revisionDate")
+
+            entry = old.get(item_id)
+            if entry is None or revision is None or entry.revision != revision:
+                item = local.decrypt_cipher(cipher)
+                name, fields = parse_item(item)
+                if not name:
+                    continue
+                entry = Entry(revision, name, Item.from_dict(fields), *parse_keys(item))
+                changed += 1
+            entries[item_id] = entry
+
+        folders = local.folders
+        organizations = local.organizations
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        raise LocalDataError(f"cannot decrypt data file: {e}") from None
+
+    return build_vault(entries, changed, previous, folders, organizations)
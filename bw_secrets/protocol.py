@@ -0,0 +1,102 @@
+"""Length-prefixed framed protocol for the daemon socket.
+
+A connection starts in the line-based text protocol. Sending the line
+`FRAMED 1` switches it to frames; the daemon confirms with `OK framed 1`.
+
+Frame (version 1), all integers big-endian:
+
+    length (u32) | kind (u8) | field count (u16) | fields...
+    field: length (u32) | raw bytes
+
+`length` covers everything after itself. Requests carry the command and
+its arguments as separate UTF-8 fields, so item names may contain spaces.
+Responses are kind OK or ERROR with one field holding the value (or the
+error message) as raw bytes, so values may contain newlines and be of any
+size up to MAX_FRAME.
+"""
+
+import struct
+
+VERSION = 1
+HELLO = f"FRAMED {VERSION}"
+HELLO_OK = f"OK framed {VERSION}"
+
+REQUEST = 1
+OK = 2
+ERROR = 3
+
+MAX_FRAME = 256 * 1024 * 1024
+MAX_REQUEST_FRAME = 1024 * 1024
+
+_LENGTH = struct.Struct(">I")
+_HEAD = struct.Struct(">BH")
+
+
+class ProtocolError(Exception):
+    """Malformed or oversized frame."""
+
+
+class FrameTooLarge(ProtocolError):
+    """Frame length above the allowed limit."""
+
+
+def encode_frame(kind: int, fields: list) -> list:
+    """Frame as a list of buffers for writelines/sendmsg; fields are not copied."""
+    chunks = [b""]
+    body_length = _HEAD.size
+    for field in fields:
+        chunks.append(_LENGTH.pack(len(field)))
+        chunks.append(field)
+        body_length += _LENGTH.size + len(field)
+    chunks[0] = _LENGTH.pack(body_length) + _HEAD.pack(kind, len(fields))
+    return chunks
+
+
+def encode_request(parts: list[str]) -> bytes:
+    return b"".join(encode_frame(REQUEST, [part.encode() for part in parts]))
+
+
+def encode_response(response: str) -> list:
+    """Frame a text response (`OK <value>` / `ERROR <message>`).
+
+    The response is encoded once; the payload is a zero-copy slice of it.
+    """
+    data = memoryview(response.encode())
+    if response.startswith("OK"):
+        return encode_frame(OK, [data[3:]])
+    return encode_frame(ERROR, [data[6:] if response.startswith("ERROR ") else data])
+
+
+def frame_length(header: bytes, limit: int = MAX_FRAME) -> int:
+    (length,) = _LENGTH.unpack(header)
+    if length > limit:
+        raise FrameTooLarge(f"frame too large: {length} > {limit}")
+    if length < _HEAD.size:
+        raise ProtocolError(f"invalid frame length: {length}")
+    return length
+
+
+def decode_body(body: bytes) -> tuple[int, list[bytes]]:
+    """Split a frame body (everything after the length) into kind and fields."""
+    kind, count = _HEAD.unpack_from(body)
+    view = memoryview(body)
+    pos = _HEAD.size
+    fields = []
+    for _ in range(count):
+        if pos + _LENGTH.size > len(body):
+            raise ProtocolError("truncated frame")
+        (size,) = _LENGTH.unpack_from(body, pos)
+        pos += _LENGTH.size
+        if pos + size > len(body):
+            raise ProtocolError("truncated frame")
+        fields.append(bytes(view[pos:pos + size]))
+        pos += size
+    if pos != len(body):
+        raise ProtocolError("trailing bytes in frame")
+    return kind, fields
+
+
+def response_text(kind: int, fields: list[bytes]) -> str:
+    """Turn a response frame back into the text form (`OK ...` / `ERROR ...`)."""
+    payload = fields[0].decode() if fields else ""
+    return f"OK {payload}" if kind == OK else f"ERROR {payload}"
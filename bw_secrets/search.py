@@ -0,0 +1,84 @@
+"""Prefix and fuzzy (trigram) lookup over vault terms.
+
+A TermIndex holds one set of strings (item names, field names or URI
+hosts), case-folded and sorted, so a prefix query is a bisect plus a short
+forward scan. Fuzzy matching uses a trigram index (trigram -> term numbers)
+with pg_trgm-style padding: candidates come from the query's rarest
+trigrams, and only they get an exact similarity score.
+"""
+
+from bisect import bisect_left
+from collections import Counter
+
+SIMILARITY = 0.3
+# Postings counted per fuzzy query; rarer trigrams are taken first
+CANDIDATE_BUDGET = 2000
+
+
+def trigrams(s: str) -> set[str]:
+    padded = f"  {s} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(a: set[str], b: set[str]) -> float:
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared) if shared else 0.0
+
+
+class TermIndex:
+    """Sorted, case-folded terms with a trigram index."""
+
+    def __init__(self, terms):
+        pairs = sorted({(term.lower(), term) for term in terms})
+        self.keys = [key for key, _ in pairs]
+        self.terms = [term for _, term in pairs]
+        self.grams: dict[str, list[int]] = {}
+        for number, key in enumerate(self.keys):
+            for gram in trigrams(key):
+                self.grams.setdefault(gram, []).append(number)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def prefix(self, query: str, limit: int) -> list[str]:
+        """Terms starting with query (case-insensitive), shortest first."""
+        query = query.lower()
+        matches = []
+        for number in range(bisect_left(self.keys, query), len(self.keys)):
+            if not self.keys[number].startswith(query) or len(matches) >= limit * 4:
+                break
+            matches.append(self.terms[number])
+        matches.sort(key=len)
+        return matches[:limit]
+
+    def fuzzy(self, query: str, limit: int) -> list[tuple[float, str]]:
+        """(similarity, term) pairs at or above SIMILARITY, best first."""
+        query_grams = trigrams(query.lower())
+        postings = sorted(
+            (self.grams[gram] for gram in query_grams if gram in self.grams), key=len
+        )
+
+        counts = Counter()
+        budget = CANDIDATE_BUDGET
+        for numbers in postings:
+            if len(numbers) > budget:
+                break
+            counts.update(numbers)
+            budget -= len(numbers)
+
+        scored = []
+        for number, _ in counts.most_common(limit * 3):
+            score = similarity(query_grams, trigrams(self.keys[number]))
+            if score >= SIMILARITY:
+                scored.append((score, self.terms[number]))
+        scored.sort(key=lambda pair: (-pair[0], pair[1]))
+        return scored[:limit]
+
+    def search(self, query: str, limit: int) -> list[tuple[float, str]]:
+        """Prefix matches (scored above any fuzzy match) followed by fuzzy ones."""
+        results = {}
+        for term in self.prefix(query, limit):
+            results[term] = 1.0 + len(query) / len(term)
+        for score, term in self.fuzzy(query, limit):
+            results.setdefault(term, score)
+        return sorted(((score, term) for term, score in results.items()), reverse=True)[:limit]
@@ -0,0 +1,182 @@
+"""Encrypted on-disk snapshot of the parsed vault for warm daemon restarts.
+
+File layout (version 3):
+
+    MAGIC (6) | version (1) | cipher (1) | salt (16) | nonce (12) | ciphertext | tag
+
+The key is a random snapshot key kept in Keychain, or the bw session key;
+both are full-entropy, so the encryption and MAC keys are derived with
+HMAC-SHA256 (HKDF) rather than a password KDF. The cipher is AES-256-GCM
+when the optional `cryptography` package is installed (16-byte tag), else
+a SHAKE-256 counter keystream with HMAC-SHA256 (encrypt-then-MAC, 32-byte
+tag) using only stdlib.
+"""
+
+import hashlib
+import hmac
+import json
+import mmap
+import os
+import tempfile
+
+from .bitwarden import Entry, Item, Vault
+
+SNAPSHOT_PATH = os.environ.get(
+    "BW_SECRETS_SNAPSHOT",
+    os.path.join(os.path.expanduser("~"), ".cache", "bw-secrets", "vault.snapshot"),
+)
+
+MAGIC = b"BWSNAP"
+VERSION = 3
+KEY_SIZE = 32
+SALT_SIZE = 16
+NONCE_SIZE = 12
+HEADER_SIZE = len(MAGIC) + 2 + SALT_SIZE + NONCE_SIZE
+CHUNK_SIZE = 1 << 20
+
+CIPHER_AESGCM = 1
+CIPHER_SHAKE = 2
+TAG_SIZES = {CIPHER_AESGCM: 16, CIPHER_SHAKE: 32}
+
+
+class SnapshotError(Exception):
+    """Snapshot is missing, corrupted, from another version or another key."""
+
+
+def _aesgcm():
+    try:
+        from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    except ImportError:
+        return None
+    return AESGCM
+
+
+def _derive_keys(secret: bytes, salt: bytes) -> tuple[bytes, bytes]:
+    prk = hmac.new(salt, secret, "sha256").digest()
+    enc_key = hmac.new(prk, b"bw-secrets snapshot enc\x01", "sha256").digest()
+    mac_key = hmac.new(prk, b"bw-secrets snapshot mac\x01", "sha256").digest()
+    return enc_key, mac_key
+
+
+def _xor_keystream(data, enc_key: bytes, nonce: bytes) -> bytearray:
+    """XOR data with the SHAKE-256 keystream, one chunk at a time."""
+    out = bytearray(len(data))
+    for start in range(0, len(data), CHUNK_SIZE):
+        chunk = data[start:start + CHUNK_SIZE]
+        block = hashlib.shake_256(enc_key + nonce + start.to_bytes(8, "big")).digest(len(chunk))
+        value = int.from_bytes(chunk, "big") ^ int.from_bytes(block, "big")
+        out[start:start + len(chunk)] = value.to_bytes(len(chunk), "big")
+    return out
+
+
+def encode_vault(vault: Vault) -> bytes:
+    """Serialize parsed entries and folder/organization names to bytes."""
+    records = [
+        [item_id, entry.revision, entry.name, dict(entry.fields),
+         list(entry.hosts), entry.folder, entry.org]
+        for item_id, entry in vault.entries.items()
+    ]
+    data = {
+        "folders": vault.folders,
+        "organizations": vault.organizations,
+        "entries": records,
+    }
+    return json.dumps(data, separators=(",", ":")).encode()
+
+
+def decode_vault(data: bytes) -> Vault:
+    """Inverse of encode_vault."""
+    data = json.loads(data)
+    entries = {
+        item_id: Entry(revision, name, Item.from_dict(fields), tuple(hosts), folder, org)
+        for item_id, revision, name, fields, hosts, folder, org in data["entries"]
+    }
+    vault = Vault(entries, data["folders"], data["organizations"])
+    vault.changed = 0
+    return vault
+
+
+def save_snapshot(vault: Vault, key: bytes, path: str = SNAPSHOT_PATH):
+    """Encrypt and atomically write the vault snapshot (mode 600)."""
+    aesgcm = _aesgcm()
+    cipher = CIPHER_AESGCM if aesgcm is not None else CIPHER_SHAKE
+    salt = os.urandom(SALT_SIZE)
+    nonce = os.urandom(NONCE_SIZE)
+    enc_key, mac_key = _derive_keys(key, salt)
+
+    header = MAGIC + bytes([VERSION, cipher]) + salt + nonce
+    plaintext = encode_vault(vault)
+    if aesgcm is not None:
+        # The 16-byte tag is appended to the ciphertext
+        body = aesgcm(enc_key).encrypt(nonce, plaintext, header)
+    else:
+        body = _xor_keystream(plaintext, enc_key, nonce)
+        mac = hmac.new(mac_key, header, "sha256")
+        mac.update(body)
+        body += mac.digest()
+
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".snapshot-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header)
+            f.write(body)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def load_snapshot(key: bytes, path: str = SNAPSHOT_PATH) -> Vault:
+    """Memory-map, authenticate and decrypt the vault snapshot."""
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        raise SnapshotError("no snapshot") from None
+
+    if os.fstat(f.fileno()).st_size < HEADER_SIZE + min(TAG_SIZES.values()):
+        f.close()
+        raise SnapshotError("not a snapshot file")
+
+    with f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if mm[:len(MAGIC)] != MAGIC:
+            raise SnapshotError("not a snapshot file")
+        if mm[len(MAGIC)] != VERSION:
+            raise SnapshotError(f"unsupported snapshot version: {mm[len(MAGIC)]}")
+        cipher = mm[len(MAGIC) + 1]
+        if cipher not in TAG_SIZES:
+            raise SnapshotError(f"unsupported snapshot cipher: {cipher}")
+        aesgcm = _aesgcm()
+        if cipher == CIPHER_AESGCM and aesgcm is None:
+            raise SnapshotError("snapshot needs the 'cryptography' package")
+
+        header = mm[:HEADER_SIZE]
+        salt = header[len(MAGIC) + 2:len(MAGIC) + 2 + SALT_SIZE]
+        nonce = header[-NONCE_SIZE:]
+        enc_key, mac_key = _derive_keys(key, salt)
+
+        view = memoryview(mm)
+        try:
+            if cipher == CIPHER_AESGCM:
+                from cryptography.exceptions import InvalidTag
+                try:
+                    plaintext = aesgcm(enc_key).decrypt(nonce, view[HEADER_SIZE:], header)
+                except InvalidTag:
+                    raise SnapshotError("wrong key or corrupted snapshot") from None
+            else:
+                tag_size = TAG_SIZES[cipher]
+                expected = hmac.new(mac_key, view[:-tag_size], "sha256").digest()
+                if not hmac.compare_digest(expected, view[-tag_size:]):
+                    raise SnapshotError("wrong key or corrupted snapshot")
+                plaintext = _xor_keystream(view[HEADER_SIZE:-tag_size], enc_key, nonce)
+        finally:
+            view.release()
+
+    try:
+        return decode_vault(plaintext)
+    except (ValueError, TypeError, KeyError) as e:
+        raise SnapshotError(f"invalid snapshot contents: {e}") from None
+    finally:
+        if isinstance(plaintext, bytearray):
+            plaintext[:] = bytes(len(plaintext))
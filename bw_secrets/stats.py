@@ -0,0 +1,200 @@
+"""Daemon metrics: request counts, lookup hits, latency histograms, reloads.
+
+Collected in-process by the daemon and exposed by the STATS command as
+JSON or in the Prometheus text format. Recording a request is a bisect
+over fixed bucket bounds plus a few integer increments.
+"""
+
+import time
+from bisect import bisect_left
+
+# Histogram bucket upper bounds, seconds (the last bucket is +Inf)
+BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; quantiles are interpolated within a bucket."""
+    __slots__ = ("counts", "count", "sum", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = BUCKETS[i - 1] if i else 0.0
+                upper = BUCKETS[i] if i < len(BUCKETS) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / count, self.max)
+            seen += count
+        return self.max
+
+    def to_dict(self) -> dict:
+        result = {"count": self.count, "sum": self.sum, "max": self.max}
+        for q in QUANTILES:
+            result[f"p{round(q * 100)}"] = self.quantile(q)
+        return result
+
+    def prometheus(self, name: str, labels: str = "") -> list[str]:
+        sep = "," if labels else ""
+        lines = []
+        cumulative = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels}{sep}le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels}{sep}le="+Inf"}} {self.count}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {self.sum}")
+        lines.append(f"{name}_count{suffix} {self.count}")
+        return lines
+
+
+class CommandStats:
+    __slots__ = ("count", "errors", "latency")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.latency = Histogram()
+
+
+class Stats:
+    """Counters of one daemon process."""
+
+    def __init__(self):
+        self.started = time.time()
+        self.commands: dict[str, CommandStats] = {}
+        self.hits = 0
+        self.misses = 0
+        self.reloads_ok = 0
+        self.reloads_failed = 0
+        self.reload_time = Histogram()
+        self.last_reload: dict | None = None
+        self.connections_total = 0
+        self.connections_active = 0
+        # Overload protection (see daemon.Limits)
+        self.connections_queued = 0
+        self.connections_rejected = 0
+        self.read_timeouts = 0
+        self.write_timeouts = 0
+        self.oversized_requests = 0
+        self.watchers_rejected = 0
+
+    def request(self, command: str, seconds: float, error: bool):
+        stats = self.commands.get(command)
+        if stats is None:
+            stats = self.commands[command] = CommandStats()
+        stats.count += 1
+        if error:
+            stats.errors += 1
+        # Histogram.observe inlined: this runs on every request
+        latency = stats.latency
+        latency.counts[bisect_left(BUCKETS, seconds)] += 1
+        latency.count += 1
+        latency.sum += seconds
+        if seconds > latency.max:
+            latency.max = seconds
+
+    def reload(self, seconds: float, error: str | None = None):
+        if error is None:
+            self.reloads_ok += 1
+        else:
+            self.reloads_failed += 1
+        self.reload_time.observe(seconds)
+        self.last_reload = {"at": time.time(), "seconds": seconds, "error": error}
+
+    def to_dict(self, **gauges) -> dict:
+        """All counters as a JSON-ready dict; gauges (vault size etc.) are added as is."""
+        return {
+            "uptime": time.time() - self.started,
+            **gauges,
+            "commands": {
+                command: {"count": stats.count, "errors": stats.errors,
+                          "latency": stats.latency.to_dict()}
+                for command, stats in sorted(self.commands.items())
+            },
+            "lookups": {"hits": self.hits, "misses": self.misses},
+            "reloads": {
+                "ok": self.reloads_ok,
+                "failed": self.reloads_failed,
+                "duration": self.reload_time.to_dict(),
+                "last": self.last_reload,
+            },
+            "connections": {
+                "total": self.connections_total,
+                "active": self.connections_active,
+                "queued": self.connections_queued,
+                "rejected": self.connections_rejected,
+                "read_timeouts": self.read_timeouts,
+                "write_timeouts": self.write_timeouts,
+                "oversized_requests": self.oversized_requests,
+                "watchers_rejected": self.watchers_rejected,
+            },
+        }
+
+    def prometheus(self, **gauges) -> str:
+        """Prometheus text exposition format; gauges become bw_secrets_<name>."""
+        commands = sorted(self.commands.items())
+        lines = [
+            "# TYPE bw_secrets_uptime_seconds gauge",
+            f"bw_secrets_uptime_seconds {time.time() - self.started}",
+        ]
+        for name, value in gauges.items():
+            lines += [f"# TYPE bw_secrets_{name} gauge", f"bw_secrets_{name} {value}"]
+
+        lines.append("# TYPE bw_secrets_requests_total counter")
+        lines += [f'bw_secrets_requests_total{{command="{command}"}} {stats.count}'
+                  for command, stats in commands]
+        lines.append("# TYPE bw_secrets_request_errors_total counter")
+        lines += [f'bw_secrets_request_errors_total{{command="{command}"}} {stats.errors}'
+                  for command, stats in commands]
+        lines.append("# TYPE bw_secrets_request_duration_seconds histogram")
+        for command, stats in commands:
+            lines += stats.latency.prometheus(
+                "bw_secrets_request_duration_seconds", f'command="{command}"'
+            )
+
+        lines += [
+            "# TYPE bw_secrets_lookups_total counter",
+            f'bw_secrets_lookups_total{{result="hit"}} {self.hits}',
+            f'bw_secrets_lookups_total{{result="miss"}} {self.misses}',
+            "# TYPE bw_secrets_reloads_total counter",
+            f'bw_secrets_reloads_total{{outcome="ok"}} {self.reloads_ok}',
+            f'bw_secrets_reloads_total{{outcome="failed"}} {self.reloads_failed}',
+            "# TYPE bw_secrets_reload_duration_seconds histogram",
+            *self.reload_time.prometheus("bw_secrets_reload_duration_seconds"),
+            "# TYPE bw_secrets_connections_total counter",
+            f"bw_secrets_connections_total {self.connections_total}",
+            "# TYPE bw_secrets_connections_active gauge",
+            f"bw_secrets_connections_active {self.connections_active}",
+            "# TYPE bw_secrets_connections_queued_total counter",
+            f"bw_secrets_connections_queued_total {self.connections_queued}",
+            "# TYPE bw_secrets_connections_rejected_total counter",
+            f"bw_secrets_connections_rejected_total {self.connections_rejected}",
+            "# TYPE bw_secrets_timeouts_total counter",
+            f'bw_secrets_timeouts_total{{direction="read"}} {self.read_timeouts}',
+            f'bw_secrets_timeouts_total{{direction="write"}} {self.write_timeouts}',
+            "# TYPE bw_secrets_oversized_requests_total counter",
+            f"bw_secrets_oversized_requests_total {self.oversized_requests}",
+            "# TYPE bw_secrets_watchers_rejected_total counter",
+            f"bw_secrets_watchers_rejected_total {self.watchers_rejected}",
+        ]
+        return "".join(f"{line}\n" for line in lines)
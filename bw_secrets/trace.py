@@ -0,0 +1,86 @@
+"""Opt-in per-request tracing: a trace id plus monotonic phase timestamps.
+
+A client asks for a trace by prefixing its request with `@<trace id>` (a
+line prefix in the text protocol, a first field in the framed one); the
+daemon also samples untagged requests at BW_TRACE_SAMPLE. Finished traces
+go to a ring buffer dumped by the TRACE command. A trace holds the command
+name and phase timings only, never arguments or values.
+"""
+
+import os
+import random
+import time
+from collections import deque
+
+MAX_ID = 32
+
+
+def new_id() -> str:
+    return os.urandom(4).hex()
+
+
+def split_trace(request: str | list[str]) -> tuple[str | None, str | list[str]]:
+    """Strip a leading `@<trace id>` from a request line or field list."""
+    if isinstance(request, str):
+        if request.startswith("@"):
+            trace_id, _, request = request.partition(" ")
+            return trace_id[1:MAX_ID + 1], request.lstrip()
+    elif request and request[0].startswith("@"):
+        return request[0][1:MAX_ID + 1], request[1:]
+    return None, request
+
+
+def process_age() -> float | None:
+    """Seconds since this process was started (Linux /proc only)."""
+    try:
+        with open("/proc/self/stat") as f:
+            # Fields after the parenthesized command name; starttime is field 22
+            start_ticks = int(f.read().rpartition(")")[2].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    return max(0.0, uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+
+
+class Trace:
+    """Timestamps of one request's phases, relative to its origin."""
+    __slots__ = ("id", "command", "started", "origin", "phases")
+
+    def __init__(self, trace_id: str | None = None, origin: float | None = None):
+        self.id = trace_id or new_id()
+        self.command = ""
+        self.started = time.time()
+        self.origin = time.perf_counter() if origin is None else origin
+        self.phases: list[tuple[str, float]] = []
+
+    def mark(self, phase: str):
+        self.phases.append((phase, time.perf_counter() - self.origin))
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "command": self.command,
+            "started": self.started,
+            "phases": [[phase, seconds] for phase, seconds in self.phases],
+        }
+
+
+class Tracer:
+    """Sampling decision and the ring buffer of finished traces."""
+
+    def __init__(self, sample: float = 0.0, size: int = 256):
+        self.sample = sample
+        self.traces: deque[Trace] = deque(maxlen=size)
+
+    def start(self, trace_id: str | None, origin: float) -> Trace | None:
+        """Trace for a request: always when the client sent an id, else sampled."""
+        if trace_id is None and not (self.sample and random.random() < self.sample):
+            return None
+        return Trace(trace_id, origin)
+
+    def finish(self, trace: Trace):
+        self.traces.append(trace)
+
+    def dump(self, trace_id: str | None = None) -> list[dict]:
+        return [trace.to_dict() for trace in self.traces if trace_id in (None, trace.id)]